@@ -0,0 +1,8 @@
+"""
+GeneGPT re-implementation: GeneTuring / GeneHop evaluation against Azure OpenAI
+with NCBI E-utilities and BLAST tool use.
+
+Importing the package (or any of its modules) has no side effects; heavy
+dependencies such as mlflow, matplotlib, torch and openai are loaded on first
+use. Run ``python -m genegpt --help`` for the command-line entry points.
+"""
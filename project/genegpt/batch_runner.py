@@ -0,0 +1,273 @@
+import json
+import os
+import time
+from itertools import count
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .openai_clients import Usage
+from .response_cache import ResponseCache
+
+BATCH_ENDPOINT = "/chat/completions"
+COMPLETION_WINDOW = "24h"
+# Azure caps a batch input file at 100k requests
+MAX_REQUESTS_PER_BATCH = 100_000
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchError(RuntimeError):
+    """A batch job ended in a state other than completed."""
+
+
+RowConfig = Union[Dict[str, Any], Callable[[Any], Dict[str, Any]]]
+
+
+def _config_for(config: RowConfig, row: Any) -> Dict[str, Any]:
+    return config(row) if callable(config) else config
+
+
+def build_batch_requests(
+    df: pd.DataFrame,
+    make_messages: Callable[[Any], List[Dict[str, str]]],
+    config: RowConfig,
+) -> List[Dict[str, Any]]:
+    """
+    One Batch API request line per row, with the row id as custom_id. Rows
+    are grouped by task so requests sharing a prompt prefix sit together.
+    `config` is the sampling config, or a function giving it per row.
+    """
+    ordered = df.sort_values("task", kind="stable") if "task" in df else df
+    return [
+        {
+            "custom_id": str(idx),
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {"messages": make_messages(row), **_config_for(config, row)},
+        }
+        for idx, row in ordered.iterrows()
+    ]
+
+
+def write_batch_file(requests: Iterable[Dict[str, Any]], path: str) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_batch_output(text: str) -> Dict[str, Tuple[str, Usage]]:
+    """
+    Map custom_id to (content, usage) from a batch output or error file.
+    Failed requests come back as "[ERROR] ..." predictions.
+    """
+    outputs: Dict[str, Tuple[str, Usage]] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code", 200) != 200:
+            error = record.get("error") or body.get("error") or body
+            outputs[record["custom_id"]] = (f"[ERROR] {error}", Usage())
+            continue
+        content = body["choices"][0]["message"].get("content") or ""
+        usage = body.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        outputs[record["custom_id"]] = (
+            content.strip(),
+            Usage(
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+                details.get("cached_tokens", 0),
+            ),
+        )
+    return outputs
+
+
+class BatchRunner:
+    """
+    Submit chat-completion requests through the Batch API: upload the JSONL
+    file, create the batch, poll until it finishes and download the results.
+    `client` is an AzureOpenAI/OpenAI client or a `PlaybackBatchClient`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        work_dir: str = ".",
+        min_poll: float = 10.0,
+        max_poll: float = 120.0,
+        timeout: float = 24 * 3600.0,
+    ) -> None:
+        self.client = client
+        self.work_dir = work_dir
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.timeout = timeout
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        print(f"Submitted batch {batch.id} ({path})")
+        return batch.id
+
+    def wait(self, batch_id: str) -> Any:
+        """Poll with a growing interval until the batch reaches a final state."""
+        deadline = time.monotonic() + self.timeout
+        delay = self.min_poll
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            if time.monotonic() > deadline:
+                raise BatchError(f"Batch {batch_id} still {batch.status} at timeout")
+            time.sleep(delay)
+            delay = min(self.max_poll, delay * 1.5)
+
+    def download(self, batch: Any) -> Dict[str, Tuple[str, Usage]]:
+        if batch.status != "completed":
+            raise BatchError(f"Batch {batch.id} ended as {batch.status}")
+        outputs: Dict[str, Tuple[str, Usage]] = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                outputs.update(parse_batch_output(text))
+        return outputs
+
+    def run(
+        self, requests: List[Dict[str, Any]], name: str = "batch"
+    ) -> Dict[str, Tuple[str, Usage]]:
+        """
+        Submit `requests` (split into MAX_REQUESTS_PER_BATCH-sized files) and
+        return (content, usage) by custom_id once every batch has finished.
+        """
+        batch_ids = []
+        for part, start in enumerate(range(0, len(requests), MAX_REQUESTS_PER_BATCH)):
+            path = os.path.join(self.work_dir, f"{name}_input_{part}.jsonl")
+            write_batch_file(requests[start : start + MAX_REQUESTS_PER_BATCH], path)
+            batch_ids.append(self.submit(path))
+
+        outputs: Dict[str, Tuple[str, Usage]] = {}
+        for batch_id in batch_ids:
+            outputs.update(self.download(self.wait(batch_id)))
+        missing = {r["custom_id"] for r in requests} - set(outputs)
+        for custom_id in missing:
+            outputs[custom_id] = ("[ERROR] missing from batch output", Usage())
+        return outputs
+
+
+def run_batch(
+    df: pd.DataFrame,
+    make_messages: Callable[[Any], List[Dict[str, str]]],
+    config: RowConfig,
+    runner: BatchRunner,
+    cache: Optional[ResponseCache] = None,
+    name: str = "batch",
+) -> Dict[Any, Tuple[str, Usage]]:
+    """
+    Answer every row of `df` through one batch job and return (content, usage)
+    keyed by the dataframe's own row ids. Rows already in `cache` are not
+    submitted; fresh answers are added to it for later interactive runs. A
+    row whose `make_messages` raises gets an "[ERROR] ..." output and is left
+    out of the job.
+    """
+    outputs: Dict[Any, Tuple[str, Usage]] = {}
+    messages = {}
+    for idx, row in df.iterrows():
+        try:
+            messages[idx] = make_messages(row)
+        except Exception as e:
+            outputs[idx] = (f"[ERROR] {e}", Usage())
+    df = df[df.index.isin(list(messages))]
+    keys = {
+        idx: ResponseCache.make_key(messages[idx], _config_for(config, row))
+        for idx, row in df.iterrows()
+    }
+    if cache is not None:
+        for idx, key in keys.items():
+            cached = cache.get(key)
+            if cached is not None:
+                outputs[idx] = (cached, Usage())
+
+    todo = df[~df.index.isin(list(outputs))]
+    if len(todo):
+        requests = build_batch_requests(todo, lambda row: messages[row.name], config)
+        results = runner.run(requests, name)
+        for idx in todo.index:
+            content, usage = results[str(idx)]
+            outputs[idx] = (content, usage)
+            if cache is not None and not content.startswith("[ERROR]"):
+                cache.put(keys[idx], content)
+    return outputs
+
+
+# === Playback stub ===
+# Stands in for the Files and Batches APIs so batch mode can be exercised
+# without a network or a batch deployment.
+
+
+class PlaybackBatchClient:
+    """
+    Answers every submitted batch with the lines of a recorded batch output
+    file, matched by custom_id. The batch reports `in_progress` for
+    `polls_until_done` polls before it completes.
+    """
+
+    def __init__(self, output_path: str, polls_until_done: int = 1) -> None:
+        with open(output_path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        self._recorded = {json.loads(line)["custom_id"]: line for line in lines}
+        self.polls_until_done = polls_until_done
+        self._files: Dict[str, str] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self._ids = count()
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve
+        )
+
+    def _create_file(self, file: Any, purpose: str) -> SimpleNamespace:
+        file_id = f"file-{next(self._ids)}"
+        self._files[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(
+        self, input_file_id: str, endpoint: str, completion_window: str
+    ) -> SimpleNamespace:
+        custom_ids = [
+            json.loads(line)["custom_id"]
+            for line in self._files[input_file_id].splitlines()
+            if line.strip()
+        ]
+        output_id = f"file-{next(self._ids)}"
+        self._files[output_id] = "\n".join(
+            self._recorded[c] for c in custom_ids if c in self._recorded
+        )
+        batch = SimpleNamespace(
+            id=f"batch-{next(self._ids)}",
+            status="validating",
+            output_file_id=output_id,
+            error_file_id=None,
+            polls=0,
+        )
+        self._batches[batch.id] = batch
+        return batch
+
+    def _retrieve(self, batch_id: str) -> SimpleNamespace:
+        batch = self._batches[batch_id]
+        batch.polls += 1
+        batch.status = (
+            "completed" if batch.polls > self.polls_until_done else "in_progress"
+        )
+        return batch
@@ -0,0 +1,329 @@
+# End-to-end throughput benchmark that runs offline against recorded fixtures.
+#
+#   # Once, with network access: record every Azure OpenAI / NCBI exchange
+#   python -m genegpt benchmark record --fixtures bench_fixtures --data-dir ../data
+#
+#   # Any time after, offline: replay through the local stub server
+#   python -m genegpt benchmark run --fixtures bench_fixtures --latency openai=0.2 \
+#       --output bench.json --baseline bench_baseline.json
+#
+# Each workload runs in its own process, so CPU time and peak RSS are that
+# workload's alone. With --baseline, a workload whose rows/second drops by more
+# than --max-regression makes the run exit non-zero.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from .blast_jobs import BLAST_URL
+from .eutils import EUTILS_BASE_URL
+from .fixture_server import FixtureServer, FixtureStore
+from .result_sink import read_jsonl
+
+# Directory holding the genegpt package, for the child processes' sys.path
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXCHANGES_FILE = "exchanges.jsonl"
+DATASETS = ("geneturing.json", "genehop.json")
+JUDGE_INPUT = "judge_input.csv"
+
+
+@dataclass
+class Workload:
+    name: str
+    argv: Callable[[str, str], List[str]]  # (fixtures, output dir) -> command
+    rows: Callable[[str], int]  # output dir -> rows processed
+
+
+@dataclass
+class Measurement:
+    workload: str
+    rows: int
+    wall_s: float
+    cpu_s: float
+    peak_rss_mb: float
+    rows_per_s: float
+    exit_code: int
+
+
+def _count_jsonl(name: str) -> Callable[[str], int]:
+    return lambda out: len(read_jsonl(os.path.join(out, name)))
+
+
+def _count_csv(name: str) -> Callable[[str], int]:
+    def count(out: str) -> int:
+        path = os.path.join(out, name)
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            return max(0, sum(1 for _ in f) - 1)
+
+    return count
+
+
+def _command(name: str, *args: str) -> List[str]:
+    return [sys.executable, "-m", "genegpt", name, *args]
+
+
+WORKLOADS: Dict[str, Workload] = {
+    w.name: w
+    for w in [
+        Workload(
+            "evaluate_dataset[geneturing]",
+            lambda fx, out: _command(
+                "geneturing",
+                "--results-jsonl",
+                os.path.join(out, "geneturing.jsonl"),
+            ),
+            _count_jsonl("geneturing.jsonl"),
+        ),
+        Workload(
+            "evaluate_dataset[genehop]",
+            lambda fx, out: _command(
+                "genehop",
+                "--results-jsonl",
+                os.path.join(out, "genehop.jsonl"),
+            ),
+            _count_jsonl("genehop.jsonl"),
+        ),
+        Workload(
+            "compute_cosine_similarity",
+            lambda fx, out: _command(
+                "benchmark", "cosine", "--fixtures", fx, "--output-dir", out
+            ),
+            _count_csv("cosine.csv"),
+        ),
+        Workload(
+            "llm_judge",
+            lambda fx, out: _command(
+                "judge",
+                "--input_csv",
+                os.path.join(fx, JUDGE_INPUT),
+                "--output_csv",
+                os.path.join(out, "judge.csv"),
+            ),
+            _count_csv("judge.csv"),
+        ),
+    ]
+}
+
+
+def _work_dir(fixtures: str, out: str) -> str:
+    """
+    Scratch cwd for the scripts: GeneTuring reads ./data/ and GeneHop reads
+    ../data/, so both are links to the fixture datasets.
+    """
+    cwd = os.path.join(out, "work")
+    os.makedirs(cwd, exist_ok=True)
+    for link in (os.path.join(out, "data"), os.path.join(cwd, "data")):
+        if not os.path.exists(link):
+            os.symlink(os.path.abspath(os.path.join(fixtures, "data")), link)
+    return cwd
+
+
+def _environment(server: FixtureServer, out: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [PACKAGE_ROOT, os.getenv("PYTHONPATH")])
+        ),
+        "AZURE_OPENAI_ENDPOINT_OVERRIDE": server.url("openai"),
+        "AZURE_OPENAI_KEY": os.getenv("AZURE_OPENAI_KEY", "benchmark"),
+        "AZURE_OPENAI_API_VERSION": os.getenv(
+            "AZURE_OPENAI_API_VERSION", "2024-08-01-preview"
+        ),
+        "NCBI_EUTILS_URL": server.url("eutils"),
+        "NCBI_BLAST_URL": server.url("blast"),
+        "NCBI_BLAST_MIN_DELAY": "0.1",
+        "NCBI_BLAST_REQUEST_INTERVAL": "0.01",
+        "MLFLOW_TRACKING_URI": "file:" + os.path.join(out, "mlruns"),
+        # Newer MLflow refuses file stores unless told otherwise
+        "MLFLOW_ALLOW_FILE_STORE": "true",
+        # Set iteration order feeds batched NCBI id lists; keep requests stable
+        "PYTHONHASHSEED": "0",
+    }
+
+
+def measure(
+    workload: Workload, fixtures: str, out: str, env: Dict[str, str]
+) -> Measurement:
+    """Run one workload in a child process and read its own rusage."""
+    log_path = os.path.join(out, f"{workload.name}.log")
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        child = subprocess.Popen(
+            workload.argv(fixtures, out),
+            cwd=_work_dir(fixtures, out),
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        _, status, usage = os.wait4(child.pid, 0)
+    wall = time.perf_counter() - start
+    child.returncode = os.waitstatus_to_exitcode(status)
+    rows = workload.rows(out)
+    return Measurement(
+        workload=workload.name,
+        rows=rows,
+        wall_s=wall,
+        cpu_s=usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        peak_rss_mb=usage.ru_maxrss / 1024,
+        rows_per_s=rows / wall if wall else 0.0,
+        exit_code=child.returncode,
+    )
+
+
+def parse_latency(values: List[str]) -> Dict[str, float]:
+    latency = {}
+    for value in values:
+        service, _, seconds = value.partition("=")
+        latency[service] = float(seconds)
+    return latency
+
+
+def regressions(
+    measurements: List[Measurement], baseline: Dict[str, dict], max_regression: float
+) -> List[str]:
+    failures = []
+    for m in measurements:
+        previous = baseline.get(m.workload)
+        if not previous:
+            continue
+        floor = previous["rows_per_s"] * (1 - max_regression)
+        if m.rows_per_s < floor:
+            failures.append(
+                f"{m.workload}: {m.rows_per_s:.2f} rows/s "
+                f"< {floor:.2f} ({previous['rows_per_s']:.2f} baseline)"
+            )
+    return failures
+
+
+def record(args: argparse.Namespace) -> None:
+    """Run every workload once against the real services, saving fixtures."""
+    os.makedirs(os.path.join(args.fixtures, "data"), exist_ok=True)
+    for name in DATASETS:
+        shutil.copy(
+            os.path.join(args.data_dir, name), os.path.join(args.fixtures, "data")
+        )
+    exchanges = os.path.join(args.fixtures, EXCHANGES_FILE)
+    if os.path.exists(exchanges):
+        os.remove(exchanges)
+    upstreams = {
+        "openai": args.openai_upstream,
+        "eutils": EUTILS_BASE_URL,
+        "blast": BLAST_URL,
+    }
+    out = tempfile.mkdtemp(prefix="bench_record_")
+    with FixtureServer(FixtureStore(exchanges), upstreams=upstreams) as server:
+        env = _environment(server, out)
+        # NCBI's own polling schedule applies while recording
+        env.pop("NCBI_BLAST_MIN_DELAY")
+        env.pop("NCBI_BLAST_REQUEST_INTERVAL")
+        for name in ("evaluate_dataset[geneturing]", "evaluate_dataset[genehop]"):
+            print(measure(WORKLOADS[name], args.fixtures, out, env))
+        # The judge is benchmarked on the GeneTuring predictions just recorded
+        shutil.copy(
+            os.path.join(out, "work", "gene_turing_openai_results.csv"),
+            os.path.join(args.fixtures, JUDGE_INPUT),
+        )
+        print(measure(WORKLOADS["llm_judge"], args.fixtures, out, env))
+        print(f"Recorded {server.served} exchanges to {exchanges}")
+
+
+def run(args: argparse.Namespace) -> int:
+    store = FixtureStore(os.path.join(args.fixtures, EXCHANGES_FILE))
+    out = args.work_dir or tempfile.mkdtemp(prefix="bench_run_")
+    measurements = []
+    with FixtureServer(store, latency=parse_latency(args.latency)) as server:
+        env = _environment(server, out)
+        for name in args.workloads or list(WORKLOADS):
+            m = measure(WORKLOADS[name], args.fixtures, out, env)
+            measurements.append(m)
+            print(
+                f"{m.workload:32s} {m.rows:5d} rows {m.rows_per_s:8.2f} rows/s "
+                f"cpu {m.cpu_s:7.2f}s peak RSS {m.peak_rss_mb:8.1f} MB"
+                + ("" if m.exit_code == 0 else f"  (exit {m.exit_code})")
+            )
+        misses = server.misses
+    print(f"Fixture misses: {misses} (logs in {out})")
+
+    report = {m.workload: asdict(m) for m in measurements}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [m.workload for m in measurements if m.exit_code != 0]
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed += regressions(measurements, json.load(f), args.max_regression)
+    for failure in failed:
+        print(f"FAILED {failure}")
+    return 1 if failed else 0
+
+
+def cosine(args: argparse.Namespace) -> None:
+    """Workload body: score the GeneHop gold answers against themselves."""
+    from . import gene_hop_no_ncbi
+
+    with open(os.path.join(args.fixtures, "data", "genehop.json")) as f:
+        gold = json.load(f)
+    preds = [
+        {"answer": " ".join(a) if isinstance(a, list) else a}
+        for qa in gold.values()
+        for a in qa.values()
+    ]
+    gene_hop_no_ncbi.data_config["output_path"] = args.output_dir
+    df = gene_hop_no_ncbi.compute_cosine_similarity(preds, gold)
+    df.to_csv(os.path.join(args.output_dir, "cosine.csv"), index=False)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Throughput benchmark over recorded NCBI/LLM fixtures."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("record", help="Record fixtures from the live services")
+    p.add_argument("--fixtures", required=True)
+    p.add_argument("--data-dir", default="../data")
+    p.add_argument(
+        "--openai-upstream",
+        default=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        help="Azure OpenAI endpoint to record from",
+    )
+    p.set_defaults(func=record)
+
+    p = commands.add_parser("run", help="Replay fixtures and measure throughput")
+    p.add_argument("--fixtures", required=True)
+    p.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="SERVICE=SECONDS",
+        help="Delay added to every openai/eutils/blast response (repeatable)",
+    )
+    p.add_argument("--workloads", nargs="+", choices=list(WORKLOADS))
+    p.add_argument("--work-dir", default=None, help="Keep outputs and logs here")
+    p.add_argument("--output", default=None, help="Write measurements as JSON")
+    p.add_argument("--baseline", default=None, help="Measurements JSON to gate on")
+    p.add_argument("--max-regression", type=float, default=0.2)
+    p.set_defaults(func=run)
+
+    p = commands.add_parser("cosine", help=argparse.SUPPRESS)
+    p.add_argument("--fixtures", required=True)
+    p.add_argument("--output-dir", required=True)
+    p.set_defaults(func=cosine)
+
+    args = parser.parse_args(argv)
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import requests
+
+from .throttle import TokenBucket
+from .tracing import span
+
+BLAST_URL = "https://blast.ncbi.nlm.nih.gov/blast/Blast.cgi"
+
+
+class BlastError(RuntimeError):
+    """BLAST rejected the query, the RID expired, or it never finished."""
+
+
+def parse_put_response(text: str) -> Tuple[Optional[str], Optional[int]]:
+    """Extract the RID and RTOE (estimated seconds to completion) from a Put reply."""
+    rid = re.search(r"RID\s*=\s*([A-Z0-9]+)", text)
+    rtoe = re.search(r"RTOE\s*=\s*(\d+)", text)
+    return (
+        rid.group(1).strip() if rid else None,
+        int(rtoe.group(1)) if rtoe else None,
+    )
+
+
+@dataclass
+class BlastJob:
+    rid: str
+    key: Tuple[str, int]
+    future: Future
+    submitted: float
+    next_poll: float
+    delay: float
+    polls: int = field(default=0)
+
+
+class BlastJobManager:
+    """
+    Queues BLAST queries without blocking the caller; one background thread
+    submits them and polls every outstanding RID.
+
+    Each job is first polled after NCBI's RTOE estimate, then with a delay
+    that grows by `backoff` up to `max_delay`. Every request to Blast.cgi
+    (submit or poll) is spaced by `request_interval` seconds. Identical
+    queries share one job, and results are delivered through futures; the
+    last `max_finished` reports are kept for repeated queries.
+    """
+
+    def __init__(
+        self,
+        url: str = BLAST_URL,
+        request_interval: float = 3.0,
+        min_delay: float = 10.0,
+        max_delay: float = 60.0,
+        backoff: float = 1.5,
+        timeout: float = 600.0,
+        session: Optional[requests.Session] = None,
+        max_finished: int = 256,
+    ) -> None:
+        self.url = url
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_finished = max_finished
+        self.session = session or requests.Session()
+        self.limiter = TokenBucket(1.0 / request_interval, 1.0)
+
+        self._jobs: Dict[str, BlastJob] = {}
+        # Queued or running queries, and the most recent finished ones
+        self._futures: Dict[Tuple[str, int], Future] = {}
+        self._finished: "OrderedDict[Tuple[str, int], Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: Deque[Tuple[Tuple[str, int], Future]] = deque()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, sequence: str, hitlist_size: int = 5) -> Future:
+        """Queue a blastn search and return a future for its text report."""
+        key = (sequence, hitlist_size)
+        with self._lock:
+            if key in self._futures:
+                return self._futures[key]
+            if key in self._finished:
+                self._finished.move_to_end(key)
+                return self._finished[key]
+            future: Future = Future()
+            self._futures[key] = future
+            self._pending.append((key, future))
+            self._ensure_worker()
+            self._wakeup.notify()
+        return future
+
+    def submit_many(self, sequences: List[str], hitlist_size: int = 5) -> List[Future]:
+        return [self.submit(seq, hitlist_size) for seq in sequences]
+
+    def blast_many(self, sequences: List[str], hitlist_size: int = 5) -> List[str]:
+        """Run all `sequences` concurrently and return their reports in order."""
+        futures = self.submit_many(sequences, hitlist_size)
+        return [f.result() for f in futures]
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="blast-jobs", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        """Submit queued searches and poll due RIDs until no work is left."""
+        try:
+            self._loop()
+        except BaseException as e:
+            # Never leave callers waiting on a worker that is gone
+            self._fail_all(BlastError(f"BLAST worker stopped: {e!r}"))
+            raise
+
+    def _loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self._jobs and not self._pending:
+                    self._worker = None
+                    return
+                due = None
+                if self._jobs:
+                    job = min(self._jobs.values(), key=lambda j: j.next_poll)
+                    wait = job.next_poll - time.monotonic()
+                    due = job if wait <= 0 else None
+                # Polls that are due go first; otherwise submit the next query
+                pending = self._pending.popleft() if not due and self._pending else None
+                if due is None and pending is None:
+                    self._wakeup.wait(timeout=wait)
+                    continue
+            try:
+                if due is not None:
+                    self._poll(due)
+                else:
+                    self._put(*pending)
+            except Exception as e:
+                # An unexpected reply fails only the query it belongs to
+                error = BlastError(f"BLAST request failed: {e!r}")
+                if due is not None:
+                    self._finish(due, error=error)
+                else:
+                    self._fail(pending[0], pending[1], error)
+
+    def _fail(self, key: Tuple[str, int], future: Future, error: Exception) -> None:
+        with self._lock:
+            self._futures.pop(key, None)
+        if not future.done():
+            future.set_exception(error)
+
+    def _fail_all(self, error: Exception) -> None:
+        with self._lock:
+            outstanding = list(self._futures.values())
+            self._futures.clear()
+            self._jobs.clear()
+            self._pending.clear()
+            self._worker = None
+        for future in outstanding:
+            if not future.done():
+                future.set_exception(error)
+
+    def _put(self, key: Tuple[str, int], future: Future) -> None:
+        sequence, hitlist_size = key
+        params = {
+            "CMD": "Put",
+            "PROGRAM": "blastn",
+            "MEGABLAST": "on",
+            "DATABASE": "nt",
+            "FORMAT_TYPE": "Text",
+            "QUERY": sequence,
+            "HITLIST_SIZE": str(hitlist_size),
+        }
+        self.limiter.acquire()
+        try:
+            with span("blast.submit"):
+                put_response = self.session.post(self.url, data=params, timeout=60)
+            rid, rtoe = parse_put_response(put_response.text)
+            error = None if rid else BlastError("Failed to retrieve RID.")
+        except requests.RequestException as e:
+            rid, rtoe = None, None
+            error = BlastError(f"BLAST submission failed: {e}")
+        if error is not None:
+            self._fail(key, future, error)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._jobs[rid] = BlastJob(
+                rid=rid,
+                key=key,
+                future=future,
+                submitted=now,
+                next_poll=now + max(self.min_delay, float(rtoe or 0)),
+                delay=self.min_delay,
+            )
+
+    def _poll(self, job: BlastJob) -> None:
+        self.limiter.acquire()
+        try:
+            with span("blast.poll"):
+                response = self.session.get(
+                    self.url,
+                    params={"CMD": "Get", "FORMAT_TYPE": "Text", "RID": job.rid},
+                    timeout=60,
+                )
+            text = response.text
+        except requests.RequestException:
+            text = "Status=WAITING"  # transient error, try again later
+        job.polls += 1
+
+        now = time.monotonic()
+        if "Status=WAITING" in text:
+            if now - job.submitted > self.timeout:
+                error = BlastError("Timed out waiting for BLAST results.")
+                self._finish(job, error=error)
+                return
+            job.delay = min(job.delay * self.backoff, self.max_delay)
+            job.next_poll = now + job.delay
+        elif "Status=FAILED" in text or "Status=UNKNOWN" in text:
+            self._finish(job, error=BlastError(f"BLAST job {job.rid} failed."))
+        else:
+            self._finish(job, text=text)
+
+    def _finish(
+        self,
+        job: BlastJob,
+        text: Optional[str] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        with self._lock:
+            self._jobs.pop(job.rid, None)
+            self._futures.pop(job.key, None)
+            # Only reports are kept; failed queries may be retried by a later submit
+            if error is None:
+                self._finished[job.key] = job.future
+                while len(self._finished) > self.max_finished:
+                    self._finished.popitem(last=False)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(text)
+
+
+_manager: Optional[BlastJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> BlastJobManager:
+    """
+    Return the process-wide BLAST job manager. `NCBI_BLAST_URL` points it at a
+    local stub, and `NCBI_BLAST_MIN_DELAY`/`NCBI_BLAST_REQUEST_INTERVAL`
+    shorten the polling schedule there (NCBI itself asks for 10s and 3s).
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = BlastJobManager(
+                url=os.getenv("NCBI_BLAST_URL", BLAST_URL),
+                request_interval=float(os.getenv("NCBI_BLAST_REQUEST_INTERVAL", "3")),
+                min_delay=float(os.getenv("NCBI_BLAST_MIN_DELAY", "10")),
+            )
+        return _manager
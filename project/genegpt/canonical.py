@@ -0,0 +1,83 @@
+"""
+Question canonicalization shared by the GeneTuring and GeneHop runs.
+
+`normalize_question` folds away what does not change a question (whitespace,
+GeneHop's "Let's decompose the question..." suffix) so repeated questions are
+answered once per run. `entity_keys` names the SNPs, diseases, sequences and
+genes a question mentions; NCBI sub-results are shared under the same
+entities (see `ncbi_prefetch.NCBILookup`).
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from .ncbi_info import extract_disease, extract_dna_sequence
+
+DECOMPOSE_SUFFIX = re.compile(r"\s*Let'?s decompose the question\b.*$", re.I)
+SNP_ID = re.compile(r"\brs\d+\b")
+GENE_PATTERNS = [
+    re.compile(r"\bgene symbol of ([\w.-]+)\?"),
+    re.compile(r"\bis ([\w.-]+) gene located\b"),
+    re.compile(r"\bConvert ([\w.-]+) to official gene symbol\b"),
+]
+
+
+def normalize_question(question: str) -> str:
+    text = " ".join(str(question).split())
+    return DECOMPOSE_SUFFIX.sub("", text)
+
+
+def question_key(task: str, question: str) -> Tuple[str, str]:
+    """
+    Rows with the same key get the same answer. The task stays in the key:
+    its generation profile shapes the request.
+    """
+    return task, normalize_question(question)
+
+
+def entity_keys(question: str) -> List[str]:
+    """Keys of the entities a question mentions, e.g. ["snp:rs1217074595"]."""
+    text = normalize_question(question)
+    keys = [f"snp:{snp_id}" for snp_id in SNP_ID.findall(text)]
+    disease = extract_disease(text)
+    if disease:
+        keys.append(f"disease:{disease.lower()}")
+    sequence = extract_dna_sequence(text)
+    if sequence:
+        keys.append(f"dna:{sequence.upper()}")
+    for pattern in GENE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            keys.append(f"gene:{match.group(1).upper()}")
+    return keys
+
+
+def duplicate_of(df: pd.DataFrame) -> Dict[Any, Any]:
+    """
+    Map the id of every row that repeats an earlier row's `question_key` to
+    the id of that first row.
+    """
+    first: Dict[Tuple[str, str], Any] = {}
+    duplicates: Dict[Any, Any] = {}
+    for idx, task, question in zip(df.index, df["task"], df["question"]):
+        key = question_key(task, question)
+        if key in first:
+            duplicates[idx] = first[key]
+        else:
+            first[key] = idx
+    return duplicates
+
+
+def dedup_metrics(df: pd.DataFrame) -> Dict[str, float]:
+    """Question and entity repetition in `df`, for MLflow."""
+    total = len(df)
+    duplicates = len(duplicate_of(df))
+    mentions = [key for question in df["question"] for key in entity_keys(question)]
+    return {
+        "unique_questions": total - duplicates,
+        "dedup_ratio": duplicates / total if total else 0.0,
+        "entity_mentions": len(mentions),
+        "unique_entities": len(set(mentions)),
+    }
@@ -0,0 +1,58 @@
+"""
+Command-line entry point: ``genegpt <command> [args...]``.
+
+Only the module behind the chosen command is imported, so ``--help`` and
+scoring-only runs start without paying for mlflow, matplotlib, torch or openai.
+"""
+
+import importlib
+import sys
+from typing import Dict, List, Optional
+
+# Command name -> module in this package exposing main(argv)
+COMMANDS: Dict[str, str] = {
+    "geneturing": "starter_geneturing_openai",
+    "genehop": "starter_genehop_openai",
+    "genehop-no-ncbi": "gene_hop_no_ncbi",
+    "judge": "llm_judge",
+    "gene-index": "gene_index",
+    "sharded": "sharded",
+    "benchmark": "benchmark",
+    "telemetry": "telemetry",
+}
+
+USAGE = """usage: genegpt <command> [args...]
+
+commands:
+  geneturing        Evaluate GeneTuring with the Azure OpenAI model
+  genehop           Evaluate GeneHop with NCBI tool use
+  genehop-no-ncbi   GeneHop structured-output baseline without NCBI data
+  judge             Score GeneHop results with an LLM judge
+  gene-index        Build an offline gene index from an NCBI gene_info dump
+  sharded           Run GeneTuring/GeneHop as N shard processes and merge them
+  benchmark         Offline throughput benchmark over recorded fixtures
+  telemetry         Upload MLflow telemetry spooled while the server was down
+
+Run 'genegpt <command> --help' for the options of a command."""
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(USAGE)
+        return
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(USAGE, file=sys.stderr)
+        sys.exit(f"genegpt: unknown command {command!r}")
+
+    from dotenv import load_dotenv
+
+    # Before the import: some modules read their deployment settings at import
+    load_dotenv()
+    module = importlib.import_module(f".{COMMANDS[command]}", __package__)
+    module.main(rest)
+
+
+if __name__ == "__main__":
+    main()
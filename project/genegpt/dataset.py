@@ -0,0 +1,184 @@
+"""
+GeneTuring / GeneHop question sets.
+
+Both files are nested ``{task: {question: answer}}`` JSON. Rows are flattened in
+file order and numbered with a global ``id`` (the row's position in the whole
+file), so a row keeps its id under any task filter, per-task limit or shard and
+results from separate runs merge without clashes.
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+COLUMNS = ["task", "question", "answer"]
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` of `count`: the rows whose id is `index` modulo `count`."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """Parse "i/N" (0 <= i < N)."""
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"shard must look like i/N: {spec!r}")
+        if not 0 <= index < count:
+            raise argparse.ArgumentTypeError(f"shard index out of range: {spec!r}")
+        return cls(index, count)
+
+    def __contains__(self, row_id: int) -> bool:
+        # Round-robin over ids keeps every task spread across the shards
+        return row_id % self.count == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def flatten(data: Dict[str, Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield {"id", "task", "question", "answer"} for every question, in file order."""
+    row_id = 0
+    for task, qas in data.items():
+        for question, answer in qas.items():
+            yield {"id": row_id, "task": task, "question": question, "answer": answer}
+            row_id += 1
+
+
+def select(
+    rows: Iterable[Dict[str, Any]],
+    tasks: Optional[List[str]] = None,
+    limit_per_task: Optional[int] = None,
+    shard: Optional[Shard] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Filter flattened rows. The per-task limit is applied before sharding, so
+    the shards of a selection always add up to the unsharded selection.
+    """
+    wanted = set(tasks) if tasks else None
+    taken: Dict[str, int] = {}
+    for row in rows:
+        task = row["task"]
+        if wanted is not None and task not in wanted:
+            continue
+        if limit_per_task is not None:
+            if taken.get(task, 0) >= limit_per_task:
+                continue
+            taken[task] = taken.get(task, 0) + 1
+        if shard is None or row["id"] in shard:
+            yield row
+
+
+def iter_rows(
+    path: str,
+    tasks: Optional[List[str]] = None,
+    limit_per_task: Optional[int] = None,
+    shard: Optional[Shard] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream the selected rows of a dataset file."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    yield from select(flatten(data), tasks, limit_per_task, shard)
+
+
+def load_dataframe(path: str, cache: bool = True) -> pd.DataFrame:
+    """
+    The whole dataset as a frame with `task`, `question` and `answer` columns,
+    indexed by global id. With `cache`, a Parquet copy is kept next to the JSON
+    and reused until the JSON changes (skipped when no Parquet engine is
+    installed).
+    """
+    cache_path = os.path.splitext(path)[0] + ".parquet"
+    if cache and _is_fresh(cache_path, path):
+        df = pd.read_parquet(cache_path)
+        # Answers are a mix of strings and lists, so Parquet holds them as JSON
+        df["answer"] = df["answer"].map(json.loads)
+        return df
+
+    with open(path, "r") as f:
+        df = pd.DataFrame(list(flatten(json.load(f)))).set_index("id")
+    if df.empty:
+        df = pd.DataFrame(columns=COLUMNS, index=pd.Index([], name="id"))
+    if cache:
+        _write_cache(df, cache_path)
+    return df
+
+
+def select_dataframe(
+    df: pd.DataFrame,
+    tasks: Optional[List[str]] = None,
+    limit_per_task: Optional[int] = None,
+    shard: Optional[Shard] = None,
+) -> pd.DataFrame:
+    """`select` for a frame from `load_dataframe`; ids are kept as the index."""
+    mask = df["task"].isin(tasks) if tasks else pd.Series(True, index=df.index)
+    if limit_per_task is not None:
+        mask &= df[mask].groupby("task").cumcount().reindex(df.index) < limit_per_task
+    if shard is not None:
+        mask &= df.index.to_series() % shard.count == shard.index
+    return df[mask]
+
+
+def shard_path(path: str, shard: Optional[Shard]) -> str:
+    """`path` with the shard in the name ("x.csv" -> "x.shard-0-of-4.csv")."""
+    if shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard.index}-of-{shard.count}{ext}"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --tasks, --limit-per-task and --shard to a command's parser."""
+    parser.add_argument(
+        "--tasks", nargs="+", default=None, help="Only run these tasks (default: all)"
+    )
+    parser.add_argument(
+        "--limit-per-task",
+        type=int,
+        default=None,
+        help="Keep the first N questions of each task",
+    )
+    parser.add_argument(
+        "--shard",
+        type=Shard.parse,
+        default=None,
+        metavar="I/N",
+        help="Only run shard I of N (rows whose global id is I modulo N)",
+    )
+
+
+def _is_fresh(cache_path: str, path: str) -> bool:
+    return (
+        os.path.exists(cache_path)
+        and os.path.getmtime(cache_path) >= os.path.getmtime(path)
+        and _has_parquet_engine()
+    )
+
+
+def _write_cache(df: pd.DataFrame, cache_path: str) -> None:
+    if not _has_parquet_engine():
+        return
+    columnar = df.assign(answer=df["answer"].map(json.dumps))
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        columnar.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only data directory just means no cache
+        pass
+
+
+def _has_parquet_engine() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,132 @@
+import atexit
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModel, AutoTokenizer
+
+DEFAULT_MODEL = "FremyCompany/BioLORD-2023"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "genegpt")
+
+
+def mean_pooling(output, mask):
+    emb = output[0]
+    mask = mask.unsqueeze(-1).expand(emb.size()).float()
+    return torch.sum(emb * mask, 1) / torch.clamp(mask.sum(1), min=1e-9)
+
+
+class EmbeddingEngine:
+    """
+    Sentence embeddings from a mean-pooled transformer, loaded once per process.
+
+    Texts are embedded in length-sorted, padded mini-batches so each batch pads
+    to a similar length. Embeddings requested with `cache=True` (gold answers)
+    are memoized under `cache_dir` and reused across runs; new ones are
+    written out by `close()`, which runs at exit for engines from `get_engine`.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        batch_size: int = 32,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        device: Optional[str] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+
+        self._lock = threading.Lock()
+        self._cache_path = (
+            os.path.join(cache_dir, model_name.replace("/", "__") + ".pt")
+            if cache_dir
+            else None
+        )
+        self._cache: Dict[str, torch.Tensor] = {}
+        self._dirty = False
+        if self._cache_path and os.path.exists(self._cache_path):
+            self._cache = torch.load(self._cache_path)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _encode(self, texts: List[str]) -> torch.Tensor:
+        """Embed `texts` in length-sorted batches; rows come back in input order."""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = torch.empty(len(texts), self.model.config.hidden_size)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                idx = order[start : start + self.batch_size]
+                inp = self.tokenizer(
+                    [texts[i] for i in idx],
+                    padding=True,
+                    truncation=True,
+                    return_tensors="pt",
+                ).to(self.device)
+                emb = mean_pooling(self.model(**inp), inp["attention_mask"])
+                out[idx] = F.normalize(emb, p=2, dim=1).cpu()
+        return out
+
+    def embed(self, texts: List[str], cache: bool = False) -> torch.Tensor:
+        """
+        Return an (n, hidden) tensor of L2-normalized embeddings for `texts`.
+        """
+        if not cache:
+            return self._encode(texts)
+
+        keys = [self._key(t) for t in texts]
+        with self._lock:
+            missing = {k: t for k, t in zip(keys, texts) if k not in self._cache}
+        if missing:
+            new = self._encode(list(missing.values()))
+            with self._lock:
+                for k, emb in zip(missing, new):
+                    self._cache[k] = emb.clone()
+                self._dirty = True
+        with self._lock:
+            return torch.stack([self._cache[k] for k in keys])
+
+    def save(self) -> None:
+        if not self._cache_path:
+            return
+        os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+        tmp_path = self._cache_path + ".tmp"
+        with self._lock:
+            torch.save(self._cache, tmp_path)
+            self._dirty = False
+        os.replace(tmp_path, self._cache_path)
+
+    def close(self) -> None:
+        """Write the embedding cache out if anything was added to it."""
+        if self._dirty:
+            self.save()
+
+    def similarity(
+        self, preds: List[str], golds: List[str], cache_golds: bool = True
+    ) -> torch.Tensor:
+        """Row-wise cosine similarity between `preds[i]` and `golds[i]`."""
+        pred_emb = self.embed(preds)
+        gold_emb = self.embed(golds, cache=cache_golds)
+        # Embeddings are unit length, so the row-wise dot product is the cosine
+        return (pred_emb * gold_emb).sum(dim=1)
+
+
+_engines: Dict[str, EmbeddingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_name: str = DEFAULT_MODEL) -> EmbeddingEngine:
+    """Return the process-wide engine for `model_name`, loading it on first use."""
+    with _engines_lock:
+        if model_name not in _engines:
+            engine = EmbeddingEngine(model_name)
+            atexit.register(engine.close)
+            _engines[model_name] = engine
+        return _engines[model_name]
@@ -0,0 +1,160 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .throttle import TokenBucket
+from .tracing import span
+
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+# NCBI allows 3 requests/second per IP, or 10 with an API key
+RATE_WITHOUT_KEY = 3.0
+RATE_WITH_KEY = 10.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class EUtilsClient:
+    """
+    Shared NCBI E-utilities client.
+
+    One keep-alive `requests.Session` is reused for every call, all callers
+    share a token bucket sized to NCBI's per-second limit, and 429/5xx or
+    connection errors are retried with exponential backoff (honouring
+    Retry-After). Wall-clock latency is recorded per endpoint.
+    """
+
+    def __init__(
+        self,
+        base_url: str = EUTILS_BASE_URL,
+        email: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        pool_size: int = 10,
+        rate: Optional[float] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if rate is None:
+            rate = RATE_WITH_KEY if api_key else RATE_WITHOUT_KEY
+        self.limiter = TokenBucket(rate, rate)
+
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._metrics_lock = threading.Lock()
+
+    def _retry_delay(
+        self, attempt: int, response: Optional[requests.Response]
+    ) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * 2**attempt + random.uniform(0, self.backoff)
+
+    def _record(self, endpoint: str, elapsed: float, ok: bool) -> None:
+        with self._metrics_lock:
+            self._latencies[endpoint].append(elapsed)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def request(
+        self, method: str, endpoint: str, params: Dict[str, Any]
+    ) -> requests.Response:
+        """
+        Call `{base_url}/{endpoint}` (e.g. "esearch.fcgi") with throttling and
+        retries. POST sends `params` as a form body, for long id lists.
+        Traced as "ncbi.<endpoint>", including throttle waits and retries.
+        """
+        with span(f"ncbi.{endpoint.split('.')[0]}"):
+            return self._request(method, endpoint, params)
+
+    def _request(
+        self, method: str, endpoint: str, params: Dict[str, Any]
+    ) -> requests.Response:
+        url = f"{self.base_url}/{endpoint}"
+        query = {"email": self.email, "api_key": self.api_key}
+        query.update({k: v for k, v in params.items() if v is not None})
+        payload = {"data": query} if method == "POST" else {"params": query}
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            start = time.perf_counter()
+            response = None
+            try:
+                response = self.session.request(
+                    method, url, timeout=self.timeout, **payload
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, time.perf_counter() - start, ok=False)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                retry = response.status_code in RETRY_STATUSES
+                self._record(endpoint, time.perf_counter() - start, ok=not retry)
+                if not retry or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+            time.sleep(self._retry_delay(attempt, response))
+        raise RuntimeError("unreachable")
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> requests.Response:
+        return self.request("GET", endpoint, params)
+
+    def get_json(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.get(endpoint, {"retmode": "json", **params}).json()
+
+    def post_json(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.request("POST", endpoint, {"retmode": "json", **params}).json()
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint request count, error count and mean/p95 latency (seconds)."""
+        summary = {}
+        with self._metrics_lock:
+            for endpoint, latencies in self._latencies.items():
+                ordered = sorted(latencies)
+                summary[endpoint] = {
+                    "count": len(ordered),
+                    "errors": self._errors[endpoint],
+                    "mean_s": sum(ordered) / len(ordered),
+                    "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                }
+        return summary
+
+
+_client: Optional[EUtilsClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> EUtilsClient:
+    """
+    Process-wide client configured from the environment (`Entrez.email`,
+    `Entrez.api_key`, and `NCBI_EUTILS_URL` to point at a local stub).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = EUtilsClient(
+                base_url=os.getenv("NCBI_EUTILS_URL", EUTILS_BASE_URL),
+                email=os.getenv("Entrez.email"),
+                api_key=os.getenv("Entrez.api_key"),
+            )
+        return _client
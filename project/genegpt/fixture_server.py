@@ -0,0 +1,215 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+# Per-user parameters that must not change which fixture a request matches
+VOLATILE_PARAMS = {"api_key", "email", "tool"}
+# Headers that describe the upstream connection rather than the response
+SKIP_HEADERS = {"host", "content-length", "accept-encoding", "connection"}
+# Response headers clients act on, kept with each recorded exchange
+RECORDED_HEADERS = ("Retry-After",)
+
+# First path segment -> service. The Azure SDK calls /openai/deployments/...,
+# so OpenAI traffic keeps its prefix; the NCBI ones are mounted under theirs.
+SERVICES = ("openai", "eutils", "blast")
+
+
+def request_key(
+    method: str, path: str, query: str, body: bytes, content_type: str
+) -> str:
+    """Stable fingerprint of a request, ignoring credentials and key order."""
+    params = sorted(
+        (k, v)
+        for k, v in parse_qsl(query, keep_blank_values=True)
+        if k not in VOLATILE_PARAMS
+    )
+    if body and "json" in content_type:
+        payload: Any = json.loads(body)
+    elif "x-www-form-urlencoded" in content_type:
+        payload = sorted(
+            (k, v)
+            for k, v in parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+            if k not in VOLATILE_PARAMS
+        )
+    else:
+        payload = body.decode("utf-8", errors="replace")
+    blob = json.dumps([method, path, params, payload], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class FixtureStore:
+    """
+    Recorded responses in a JSONL file, one exchange per line. A request
+    recorded several times (BLAST polls of one RID) is replayed in the same
+    order, and the last response repeats once they run out.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._responses: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._responses[record["key"]].append(record)
+        except FileNotFoundError:
+            pass
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                return None
+            position = min(self._cursor[key], len(responses) - 1)
+            self._cursor[key] += 1
+            return responses[position]
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._responses[record["key"]].append(record)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class FixtureServer:
+    """
+    Local stand-in for Azure OpenAI, NCBI E-utilities and NCBI BLAST.
+
+    With `upstreams` (service -> base URL) every request is forwarded and
+    the response recorded into `store`; without, responses are replayed
+    from it after sleeping `latency[service]` seconds, and unknown requests
+    get a 404. Point clients at `url(service)`.
+    """
+
+    def __init__(
+        self,
+        store: FixtureStore,
+        upstreams: Optional[Dict[str, str]] = None,
+        latency: Optional[Dict[str, float]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.store = store
+        self.upstreams = upstreams
+        self.latency = latency or {}
+        self.served = 0
+        self.misses = 0
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def url(self, service: str = "") -> str:
+        host, port = self._httpd.server_address[:2]
+        base = f"http://{host}:{port}"
+        # The OpenAI SDK adds /openai itself
+        return f"{base}/{service}" if service and service != "openai" else base
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fixture-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _forward(
+        self, service: str, method: str, path: str, query: str, body: bytes, headers
+    ) -> Dict[str, Any]:
+        upstream = self.upstreams[service].rstrip("/")
+        rest = path if service == "openai" else path[len(service) + 1 :]
+        response = self._session.request(
+            method,
+            upstream + rest + (f"?{query}" if query else ""),
+            data=body or None,
+            headers={k: v for k, v in headers.items() if k.lower() not in SKIP_HEADERS},
+            timeout=120,
+        )
+        return {
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "text/plain"),
+            "headers": {
+                name: response.headers[name]
+                for name in RECORDED_HEADERS
+                if name in response.headers
+            },
+            "body": response.content.decode("utf-8", errors="replace"),
+        }
+
+    def _respond(self, service: str, method: str, raw_path: str, body: bytes, headers):
+        parts = urlsplit(raw_path)
+        key = request_key(
+            method, parts.path, parts.query, body, headers.get("Content-Type", "")
+        )
+        if self.upstreams is not None:
+            record = self._forward(
+                service, method, parts.path, parts.query, body, headers
+            )
+            self.store.add(
+                {"key": key, "service": service, "path": parts.path, **record}
+            )
+        else:
+            time.sleep(self.latency.get(service, 0.0))
+            record = self.store.next(key)
+        with self._lock:
+            self.served += 1
+            if record is None:
+                self.misses += 1
+        if record is None:
+            return {
+                "status": 404,
+                "content_type": "application/json",
+                "body": json.dumps({"error": f"no fixture for {method} {parts.path}"}),
+            }
+        return record
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                segment = urlsplit(self.path).path.lstrip("/").split("/", 1)[0]
+                service = segment if segment in SERVICES else "openai"
+                record = server._respond(
+                    service, self.command, self.path, body, self.headers
+                )
+                payload = record["body"].encode("utf-8")
+                self.send_response(record["status"])
+                self.send_header("Content-Type", record["content_type"])
+                for name, value in record.get("headers", {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
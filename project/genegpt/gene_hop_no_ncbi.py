@@ -1,25 +1,22 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import argparse
 import json
 import os
 import random
 from typing import Dict, List, Optional
 
-import mlflow
 import pandas as pd
-import torch
-import torch.nn.functional as F
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 from pydantic import BaseModel, Field
 from tqdm import tqdm
-from transformers import AutoModel, AutoTokenizer
 
-# === Load ENV and Configs ===
-load_dotenv()
-os.environ["no_proxy"] = "*"
+from . import dataset
+from .openai_clients import get_client as get_openai_client
+from .telemetry import TelemetrySink
 
+# === Load ENV and Configs ===
 AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY")
 AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
 AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
@@ -58,25 +55,6 @@ system_message = (
 )
 
 
-# === Load Dataset ===
-def load_geneturing(path: str) -> List[Dict[str, str]]:
-    with open(path, "r") as f:
-        raw_data = json.load(f)
-
-    flat_data = []
-    for i, (task_name, qa_pairs) in enumerate(raw_data.items()):
-        for question, answer in qa_pairs.items():
-            flat_data.append(
-                {
-                    "id": i,
-                    "task": task_name,
-                    "question": question,
-                    "answer": answer,
-                }
-            )
-    return flat_data
-
-
 # === LLM Query ===
 def query_model(system_message: str, query: dict, api: str) -> dict:
     messages = [
@@ -92,13 +70,7 @@ def query_model(system_message: str, query: dict, api: str) -> dict:
         },
     ]
     if api == "OpenAI":
-        client = AzureOpenAI(
-            api_key=AZURE_OPENAI_KEY,
-            api_version=AZURE_OPENAI_API_VERSION,
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-            timeout=10,
-            max_retries=3,
-        )
+        client = get_openai_client().with_options(timeout=10, max_retries=3)
         response = client.beta.chat.completions.parse(
             model=model_config["model_name"],
             messages=messages,
@@ -112,9 +84,8 @@ def query_model(system_message: str, query: dict, api: str) -> dict:
 # === Structured Output Collection ===
 def collect_structured_output(dataset: List[Dict], system_message: str) -> List[Dict]:
     results = []
-    with mlflow.start_run(run_name="geneturing-eval"):
-        for param, val in model_config.items():
-            mlflow.log_param(param, val)
+    with TelemetrySink(None, run_name="geneturing-eval") as telemetry:
+        telemetry.log_params(model_config)
 
         for item in tqdm(dataset, desc="Evaluating"):
             try:
@@ -142,51 +113,39 @@ def collect_structured_output(dataset: List[Dict], system_message: str) -> List[
         )
         with open(result_json_path, "w") as f:
             json.dump(results, f, indent=2)
-        mlflow.log_artifact(result_json_path)
-        mlflow.log_metric("success_rate", pd.DataFrame(results)["success"].mean())
+        telemetry.log_artifact(result_json_path)
+        telemetry.log_metric("success_rate", pd.DataFrame(results)["success"].mean())
 
     return results
 
 
 # === Cosine Similarity Scoring ===
-def mean_pooling(output, mask):
-    emb = output[0]
-    mask = mask.unsqueeze(-1).expand(emb.size()).float()
-    return torch.sum(emb * mask, 1) / torch.clamp(mask.sum(1), min=1e-9)
-
-
 def compute_cosine_similarity(pred_data: List[Dict], gold_data: Dict) -> pd.DataFrame:
-    tokenizer = AutoTokenizer.from_pretrained("FremyCompany/BioLORD-2023")
-    model = AutoModel.from_pretrained("FremyCompany/BioLORD-2023")
-    model.eval()
-
-    gold_flat = []
-    for task, qa in gold_data.items():
-        for q, a in qa.items():
-            gold_flat.append({"task": task, "question": q.strip(), "gold": a})
-
-    results = []
-    for i, pred in enumerate(pred_data):
-        pred_ans = pred["answer"].strip()
-        gold_ans = gold_flat[i]["gold"]
+    # Predictions are matched to gold rows by global id (by position without one)
+    gold_rows = list(dataset.flatten(gold_data))
+    gold_flat = [gold_rows[pred.get("id", i)] for i, pred in enumerate(pred_data)]
+
+    pred_answers = [pred["answer"].strip() for pred in pred_data]
+    gold_answers = []
+    for row in gold_flat:
+        gold_ans = row["answer"]
         if isinstance(gold_ans, list):
             gold_ans = " ".join(gold_ans)
+        gold_answers.append(gold_ans)
 
-        inp = tokenizer([pred_ans, gold_ans], padding=True, return_tensors="pt")
-        with torch.no_grad():
-            emb = mean_pooling(model(**inp), inp["attention_mask"])
-            emb = F.normalize(emb, p=2, dim=1)
-            sim = F.cosine_similarity(emb[0], emb[1], dim=0).item()
-
-        results.append(
-            {
-                "task": gold_flat[i]["task"],
-                "question": gold_flat[i]["question"],
-                "predicted_answer": pred_ans,
-                "gold_answer": gold_ans,
-                "cosine_similarity": sim,
-            }
-        )
+    # One batched pass over all answers; gold embeddings are cached on disk
+    sims = _engine().similarity(pred_answers, gold_answers).tolist()
+
+    results = [
+        {
+            "task": gold_flat[i]["task"],
+            "question": gold_flat[i]["question"].strip(),
+            "predicted_answer": pred_answers[i],
+            "gold_answer": gold_answers[i],
+            "cosine_similarity": sims[i],
+        }
+        for i in range(len(pred_data))
+    ]
 
     df = pd.DataFrame(results)
     print("Average cosine similarity:", df["cosine_similarity"].mean())
@@ -200,13 +159,72 @@ def compute_cosine_similarity(pred_data: List[Dict], gold_data: Dict) -> pd.Data
     return df
 
 
+def embedding_similarity(pred: str | List[str], true: str | List[str]) -> float:
+    """
+    Cosine similarity of a single (prediction, gold) pair, for use as a metric.
+    """
+    return _engine().similarity([_as_text(pred)], [_as_text(true)]).item()
+
+
+def embedding_similarities(
+    preds: List[str | List[str]], trues: List[str | List[str]]
+) -> List[float]:
+    """
+    `embedding_similarity` for many pairs at once: the predictions are embedded
+    in one batched pass instead of one forward pass per row.
+    """
+    if not preds:
+        return []
+    return (
+        _engine()
+        .similarity([_as_text(p) for p in preds], [_as_text(t) for t in trues])
+        .tolist()
+    )
+
+
+def cache_gold_embeddings(golds: List[str | List[str]]) -> None:
+    """
+    Embed the gold answers `embedding_similarity` will be given in one batched
+    pass, so scoring row by row only has to embed the predictions.
+    """
+    if golds:
+        _engine().embed([_as_text(gold) for gold in golds], cache=True)
+
+
+def _as_text(answer: str | List[str]) -> str:
+    return " ".join(answer) if isinstance(answer, list) else answer
+
+
+def _engine():
+    # torch and transformers are only loaded once a similarity is needed
+    from .embedding import get_engine
+
+    return get_engine()
+
+
 # === Run ===
-if __name__ == "__main__":
-    dataset = load_geneturing(data_config["dataset_path"])
-    print(f"Loaded {len(dataset)} examples.")
-    structured_outputs = collect_structured_output(dataset, system_message)
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="GeneHop structured-output baseline without NCBI data."
+    )
+    dataset.add_arguments(parser)
+    args = parser.parse_args(argv)
+    load_dotenv()
+    os.environ["no_proxy"] = "*"
+
+    rows = list(
+        dataset.iter_rows(
+            data_config["dataset_path"], args.tasks, args.limit_per_task, args.shard
+        )
+    )
+    print(f"Loaded {len(rows)} examples.")
+    structured_outputs = collect_structured_output(rows, system_message)
 
     with open(data_config["dataset_path"], "r") as f:
         gold = json.load(f)
 
     compute_cosine_similarity(structured_outputs, gold)
+
+
+if __name__ == "__main__":
+    main()
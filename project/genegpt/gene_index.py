@@ -0,0 +1,206 @@
+import argparse
+import gzip
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Column positions in NCBI's gene_info(.gz) dump
+TAX_ID, GENE_ID, SYMBOL, SYNONYMS, MAP_LOCATION, DESCRIPTION = 0, 1, 2, 4, 7, 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS genes (
+    gene_id INTEGER PRIMARY KEY,
+    tax_id INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    map_location TEXT,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT NOT NULL COLLATE NOCASE,
+    gene_id INTEGER NOT NULL
+);
+"""
+
+# Covering indexes: each lookup is answered from the index without
+# touching the table rows
+INDEXES = """
+CREATE INDEX IF NOT EXISTS genes_symbol ON genes (symbol COLLATE NOCASE, gene_id);
+CREATE INDEX IF NOT EXISTS aliases_alias ON aliases (alias, gene_id);
+CREATE INDEX IF NOT EXISTS aliases_gene ON aliases (gene_id, alias);
+"""
+
+
+def read_gene_info(
+    path: str, tax_id: Optional[int] = None
+) -> Iterator[Tuple[int, int, str, List[str], str, str]]:
+    """Yield (gene_id, tax_id, symbol, synonyms, map_location, description)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if tax_id is not None and int(cols[TAX_ID]) != tax_id:
+                continue
+            synonyms = [] if cols[SYNONYMS] == "-" else cols[SYNONYMS].split("|")
+            yield (
+                int(cols[GENE_ID]),
+                int(cols[TAX_ID]),
+                cols[SYMBOL],
+                synonyms,
+                cols[MAP_LOCATION],
+                cols[DESCRIPTION],
+            )
+
+
+def build_index(
+    gene_info_path: str,
+    db_path: str,
+    tax_id: Optional[int] = 9606,
+    batch_size: int = 50_000,
+) -> int:
+    """
+    Load a gene_info dump into a fresh SQLite index at `db_path`.
+    Returns the number of genes indexed.
+    """
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + SCHEMA)
+
+    count = 0
+    genes, aliases = [], []
+    for gene_id, tax, symbol, synonyms, location, description in read_gene_info(
+        gene_info_path, tax_id
+    ):
+        genes.append((gene_id, tax, symbol, location, description))
+        aliases.extend((alias, gene_id) for alias in synonyms)
+        count += 1
+        if len(genes) >= batch_size:
+            conn.executemany("INSERT INTO genes VALUES (?, ?, ?, ?, ?)", genes)
+            conn.executemany("INSERT INTO aliases VALUES (?, ?)", aliases)
+            genes, aliases = [], []
+    conn.executemany("INSERT INTO genes VALUES (?, ?, ?, ?, ?)", genes)
+    conn.executemany("INSERT INTO aliases VALUES (?, ?)", aliases)
+
+    # Building the indexes after the bulk load is much faster than before it
+    conn.executescript(INDEXES)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return count
+
+
+class GeneIndex:
+    """
+    Read-only lookups against an index built by `build_index`. Each thread
+    gets its own SQLite connection.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Gene index not found: {db_path}")
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def official_symbols(self, alias: str) -> List[str]:
+        """Official symbols of genes whose symbol or synonym is `alias`."""
+        rows = self.conn.execute(
+            "SELECT symbol FROM genes WHERE symbol = ? COLLATE NOCASE "
+            "UNION "
+            "SELECT g.symbol FROM aliases a JOIN genes g USING (gene_id) "
+            "WHERE a.alias = ?",
+            (alias, alias),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def gene_ids(self, symbols: List[str]) -> List[str]:
+        """Gene ids whose official symbol (or, failing that, synonym) matches."""
+        ids: List[str] = []
+        for symbol in symbols:
+            rows = self.conn.execute(
+                "SELECT gene_id FROM genes WHERE symbol = ? COLLATE NOCASE", (symbol,)
+            ).fetchall()
+            if not rows:
+                rows = self.conn.execute(
+                    "SELECT gene_id FROM aliases WHERE alias = ?", (symbol,)
+                ).fetchall()
+            ids.extend(str(row[0]) for row in rows)
+        return list(dict.fromkeys(ids))
+
+    def summaries(self, gene_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """
+        esummary-shaped records ({"name", "otheraliases", "maplocation"}) for
+        the ids that are in the index.
+        """
+        records: Dict[str, Dict[str, str]] = {}
+        for gene_id in gene_ids:
+            row = self.conn.execute(
+                "SELECT symbol, map_location FROM genes WHERE gene_id = ?",
+                (int(gene_id),),
+            ).fetchone()
+            if row is None:
+                continue
+            aliases = self.conn.execute(
+                "SELECT alias FROM aliases WHERE gene_id = ?", (int(gene_id),)
+            ).fetchall()
+            records[gene_id] = {
+                "name": row[0],
+                "otheraliases": ", ".join(a[0] for a in aliases),
+                "maplocation": row[1],
+            }
+        return records
+
+
+_index: Optional[GeneIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_gene_index() -> Optional[GeneIndex]:
+    """
+    The index named by the NCBI_GENE_INDEX environment variable, or None when
+    it is unset so callers go straight to the network.
+    """
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            path = os.getenv("NCBI_GENE_INDEX")
+            _index = GeneIndex(path) if path else None
+            _index_loaded = True
+        return _index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build an offline gene index from an NCBI gene_info dump."
+    )
+    parser.add_argument(
+        "--gene-info", required=True, help="Path to gene_info or gene_info.gz"
+    )
+    parser.add_argument("--db", required=True, help="Output SQLite index path")
+    parser.add_argument(
+        "--tax-id",
+        type=int,
+        default=9606,
+        help="Only index this taxon (default: 9606, human; 0 for all)",
+    )
+    args = parser.parse_args(argv)
+
+    n_genes = build_index(args.gene_info, args.db, args.tax_id or None)
+    print(f"Indexed {n_genes} genes into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
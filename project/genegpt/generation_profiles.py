@@ -0,0 +1,127 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .throttle import estimate_tokens
+
+# Answers whose gold p95 fits in this many tokens are treated as one-liners
+SHORT_ANSWER_TOKENS = 32
+# Room for "Answer: " and a short lead-in on top of the answer itself
+ANSWER_OVERHEAD_TOKENS = 16
+HEADROOM = 2.0
+MIN_MAX_TOKENS = 16
+LONG_MIN_MAX_TOKENS = 256
+
+SHORT_ANSWER_INSTRUCTION = "Reply with a single line in the form 'Answer: <answer>'."
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Sampling settings for one task, layered over the base model config."""
+
+    max_tokens: int
+    temperature: float
+    stop: Optional[List[str]] = None
+    instruction: Optional[str] = None
+    gold_p95_tokens: float = 0.0
+
+    def config(self, base: Dict[str, Any]) -> Dict[str, Any]:
+        config = dict(base, max_tokens=self.max_tokens, temperature=self.temperature)
+        if self.stop:
+            config["stop"] = list(self.stop)
+        return config
+
+    def user_content(self, question: str) -> str:
+        # Goes after the question so the shared prompt prefix is unchanged
+        if self.instruction:
+            return f"{question}\n{self.instruction}"
+        return question
+
+
+@dataclass
+class GenerationProfiles:
+    base: Dict[str, Any]
+    profiles: Dict[str, GenerationProfile] = field(default_factory=dict)
+
+    def config(self, task: Optional[str]) -> Dict[str, Any]:
+        profile = self.profiles.get(task)
+        return profile.config(self.base) if profile else dict(self.base)
+
+    def user_content(self, task: Optional[str], question: str) -> str:
+        profile = self.profiles.get(task)
+        return profile.user_content(question) if profile else question
+
+    def params(self) -> Dict[str, Any]:
+        """Flat per-task settings for experiment tracking."""
+        params: Dict[str, Any] = {}
+        for task, profile in self.profiles.items():
+            params[f"max_tokens_{task}"] = profile.max_tokens
+            params[f"temperature_{task}"] = profile.temperature
+            params[f"stop_{task}"] = bool(profile.stop)
+        return params
+
+
+def derive_profiles(
+    df: pd.DataFrame, base: Dict[str, Any], answer_column: str = "answer"
+) -> GenerationProfiles:
+    """
+    Per-task profiles from the gold answer length distribution. Tasks whose
+    answers are one-liners (a symbol, a chromosome band, yes/no) get a tight
+    max_tokens, a newline stop after the Answer line and greedy decoding;
+    free-text tasks keep the base temperature and a proportionate budget.
+    """
+    base_max = base.get("max_tokens", 800)
+    profiles: Dict[str, GenerationProfile] = {}
+    for task, answers in df.groupby("task")[answer_column]:
+        lengths = answers.astype(str).map(estimate_tokens)
+        p95 = float(np.percentile(lengths, 95)) if len(lengths) else 0.0
+        if p95 <= SHORT_ANSWER_TOKENS:
+            profiles[task] = GenerationProfile(
+                max_tokens=max(
+                    MIN_MAX_TOKENS, math.ceil(ANSWER_OVERHEAD_TOKENS + HEADROOM * p95)
+                ),
+                temperature=0.0,
+                stop=["\n"],
+                instruction=SHORT_ANSWER_INSTRUCTION,
+                gold_p95_tokens=p95,
+            )
+        else:
+            profiles[task] = GenerationProfile(
+                max_tokens=min(
+                    base_max, max(LONG_MIN_MAX_TOKENS, math.ceil(2 * HEADROOM * p95))
+                ),
+                temperature=base.get("temperature", 1.0),
+                gold_p95_tokens=p95,
+            )
+    return GenerationProfiles(base=dict(base), profiles=profiles)
+
+
+def usage_by_task(results: List[Any]) -> Dict[str, float]:
+    """
+    Mean completion tokens and p95 latency per task, from rows carrying
+    `task`, `completion_tokens` and `latency_s`. Streamed rows also report
+    p95 time-to-first-token and time-to-answer.
+    """
+    frame = pd.DataFrame(
+        {
+            "task": [r.task for r in results],
+            "completion_tokens": [r.completion_tokens for r in results],
+            "latency_s": [r.latency_s for r in results],
+            "ttft_s": [getattr(r, "ttft_s", None) for r in results],
+            "time_to_answer_s": [getattr(r, "time_to_answer_s", None) for r in results],
+        }
+    )
+    metrics: Dict[str, float] = {}
+    for task, group in frame.groupby("task"):
+        metrics[f"completion_tokens_mean_{task}"] = float(
+            group["completion_tokens"].mean()
+        )
+        metrics[f"latency_p95_s_{task}"] = float(group["latency_s"].quantile(0.95))
+        for column in ("ttft_s", "time_to_answer_s"):
+            values = group[column].dropna()
+            if len(values):
+                metrics[f"{column[:-2]}_p95_s_{task}"] = float(values.quantile(0.95))
+    return metrics
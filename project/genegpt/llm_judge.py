@@ -0,0 +1,523 @@
+import argparse
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, List, Literal, Optional, Tuple
+
+import pandas as pd
+from pydantic import BaseModel
+from tqdm import tqdm
+
+from .metrics import exact_match, extract_chrom_loci, f1_score_set, fuzzy_location_score
+from .openai_clients import get_client as get_openai_client
+from .response_cache import ResponseCache
+from .throttle import AdaptiveRateLimiter
+
+if TYPE_CHECKING:
+    from openai import RateLimitError
+
+DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+JUDGE_CONFIG = {
+    "model": DEPLOYMENT_NAME,
+    "max_tokens": 150,
+    "temperature": 0,
+}
+
+MAX_ATTEMPTS = 6
+
+
+def build_judge_messages(question, answer, prediction) -> List[Dict[str, str]]:
+    prompt = f"""
+You are an expert evaluator. Given the following:
+
+Question: {question}
+Expected Answer: {answer}
+Model's Prediction: {prediction}
+
+Determine if the prediction correctly answers the question. Respond with 'Yes' or 'No' followed by a brief explanation.
+"""
+    return [{"role": "user", "content": prompt}]
+
+
+def retry_after_seconds(error: "RateLimitError") -> Optional[float]:
+    """Seconds the server asked us to wait, from the Retry-After header."""
+    headers = getattr(error.response, "headers", None) or {}
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            continue
+        return seconds / 1000 if name == "retry-after-ms" else seconds
+    return None
+
+
+def call_with_throttle(call: Callable, limiter: Optional[AdaptiveRateLimiter]):
+    """
+    Run `call(client)`, retrying throttled (429) responses at the rate
+    `limiter` adapts to. The SDK's own retries are off so every 429 reaches
+    the limiter.
+    """
+    from openai import RateLimitError
+
+    # Shared Azure OpenAI client (pooled keep-alive connections)
+    no_retry_client = get_openai_client().with_options(max_retries=0)
+    for attempt in range(MAX_ATTEMPTS):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = call(no_retry_client)
+        except RateLimitError as e:
+            if limiter is None or attempt == MAX_ATTEMPTS - 1:
+                raise
+            limiter.on_throttle(retry_after_seconds(e))
+            continue
+        if limiter is not None:
+            limiter.on_success()
+        return response
+
+
+def llm_judge(
+    question,
+    answer,
+    prediction,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+):
+    """
+    Judge one prediction. Throttled (429) calls are retried at the rate
+    `limiter` adapts to; triples already in `cache` are not sent again.
+    """
+    messages = build_judge_messages(question, answer, prediction)
+
+    def create() -> str:
+        response = call_with_throttle(
+            lambda c: c.chat.completions.create(messages=messages, **JUDGE_CONFIG),
+            limiter,
+        )
+        return response.choices[0].message.content.strip()
+
+    try:
+        if cache is not None:
+            return cache.get_or_create(messages, JUDGE_CONFIG, create)
+        return create()
+    except Exception as e:
+        print(f"Error: {e}")
+        return "Error"
+
+
+def judge_dataframe(
+    df: pd.DataFrame,
+    max_workers: int = 8,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+) -> List[str]:
+    """Judge every row concurrently; judgments come back in row order."""
+
+    def judge(row) -> str:
+        return llm_judge(
+            row["question"], row["answer"], row["prediction"], limiter, cache
+        )
+
+    rows = [row for _, row in df.iterrows()]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(tqdm(executor.map(judge, rows), total=len(rows)))
+
+
+# === Batch judging ===
+# K (question, expected, prediction) triples share one structured-output
+# request. A reply that does not parse or misses an item is split in half and
+# re-queued; a single item that still fails falls back to `llm_judge`. API
+# errors (429s that outlast the retries included) are raised, not split.
+
+
+class Verdict(BaseModel):
+    index: int
+    verdict: Literal["Yes", "No"]
+    explanation: str
+
+
+class VerdictBatch(BaseModel):
+    verdicts: List[Verdict]
+
+
+BATCH_CONFIG = {
+    "model": DEPLOYMENT_NAME,
+    "temperature": 0,
+}
+
+# Completion allowance per verdict in a batch, plus the JSON wrapper
+TOKENS_PER_VERDICT = 80
+TOKENS_PER_BATCH = 50
+
+
+def build_batch_messages(items: List[Tuple[str, str, str]]) -> List[Dict[str, str]]:
+    blocks = "\n\n".join(
+        f"[{i}]\nQuestion: {q}\nExpected Answer: {a}\nModel's Prediction: {p}"
+        for i, (q, a, p) in enumerate(items)
+    )
+    instructions = (
+        "You are an expert evaluator. For each numbered item below, "
+        "determine if the prediction correctly answers the question."
+    )
+    prompt = f"""
+{instructions}
+
+{blocks}
+
+Return one verdict per item with its index, 'Yes' or 'No', and a brief explanation.
+"""
+    return [{"role": "user", "content": prompt}]
+
+
+class BatchStats:
+    """Counters shared by the judging threads; update them with the add_* methods."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.verdicts = 0
+        self.splits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_request(self, usage) -> None:
+        with self._lock:
+            self.requests += 1
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens
+                self.completion_tokens += usage.completion_tokens
+
+    def add_verdicts(self, count: int) -> None:
+        with self._lock:
+            self.verdicts += count
+
+    def add_split(self) -> None:
+        with self._lock:
+            self.splits += 1
+
+    def tokens_per_verdict(self) -> float:
+        total = self.prompt_tokens + self.completion_tokens
+        return total / self.verdicts if self.verdicts else 0.0
+
+
+def judge_batch(
+    items: List[Tuple[str, str, str]],
+    limiter: Optional[AdaptiveRateLimiter],
+    stats: BatchStats,
+) -> Optional[List[str]]:
+    """
+    Judge `items` in one request. Returns judgments in item order, or None if
+    the reply was malformed or incomplete.
+    """
+    from openai import ContentFilterFinishReasonError, LengthFinishReasonError
+
+    messages = build_batch_messages(items)
+    try:
+        response = call_with_throttle(
+            lambda c: c.beta.chat.completions.parse(
+                messages=messages,
+                response_format=VerdictBatch,
+                max_tokens=TOKENS_PER_BATCH + TOKENS_PER_VERDICT * len(items),
+                **BATCH_CONFIG,
+            ),
+            limiter,
+        )
+    except (
+        LengthFinishReasonError,
+        ContentFilterFinishReasonError,
+        ValueError,  # pydantic's ValidationError and JSON decode errors
+    ) as e:
+        # Truncated or invalid JSON fails inside the SDK's parser
+        print(f"Batch of {len(items)} failed: {e}")
+        return None
+    stats.add_request(response.usage)
+
+    parsed = response.choices[0].message.parsed
+    if parsed is None:
+        return None
+    by_index = {v.index: v for v in parsed.verdicts}
+    if sorted(by_index) != list(range(len(items))):
+        return None
+    stats.add_verdicts(len(items))
+    return [
+        f"{by_index[i].verdict}. {by_index[i].explanation}" for i in range(len(items))
+    ]
+
+
+def judge_dataframe_batched(
+    df: pd.DataFrame,
+    batch_size: int,
+    max_workers: int = 8,
+    limiter: Optional[AdaptiveRateLimiter] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Tuple[List[str], BatchStats]:
+    """Judge `df` with `batch_size` rows per request; judgments in row order."""
+    stats = BatchStats()
+    triples = list(zip(df["question"], df["answer"], df["prediction"]))
+    judgments: List[Optional[str]] = [None] * len(triples)
+
+    def cache_key(i: int) -> str:
+        return ResponseCache.make_key(
+            build_judge_messages(*triples[i]), {**BATCH_CONFIG, "mode": "batch"}
+        )
+
+    todo = []
+    for i in range(len(triples)):
+        cached = cache.get(cache_key(i)) if cache is not None else None
+        if cached is not None:
+            judgments[i] = cached
+        else:
+            todo.append(i)
+
+    def run(rows: List[int]) -> Tuple[List[int], Optional[List[str]]]:
+        if len(rows) == 1 and batch_size > 1:
+            # Last resort for an item that keeps breaking batches
+            verdict = judge_batch([triples[rows[0]]], limiter, stats)
+            if verdict is None:
+                verdict = [llm_judge(*triples[rows[0]], limiter=limiter)]
+            return rows, verdict
+        return rows, judge_batch([triples[i] for i in rows], limiter, stats)
+
+    with (
+        ThreadPoolExecutor(max_workers=max_workers) as executor,
+        tqdm(total=len(todo)) as progress,
+    ):
+        pending = {
+            executor.submit(run, todo[start : start + batch_size])
+            for start in range(0, len(todo), batch_size)
+        }
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rows, verdicts = future.result()
+                if verdicts is None:
+                    stats.add_split()
+                    half = len(rows) // 2
+                    pending.add(executor.submit(run, rows[:half]))
+                    pending.add(executor.submit(run, rows[half:]))
+                    continue
+                for i, verdict in zip(rows, verdicts):
+                    judgments[i] = verdict
+                    if cache is not None and verdict != "Error":
+                        cache.put(cache_key(i), verdict)
+                progress.update(len(rows))
+
+    return judgments, stats
+
+
+# === Fast path ===
+# Rows the deterministic metrics already settle never reach the LLM. An exact
+# match (after light normalization) is "Yes"; otherwise the task's metric
+# decides when its score is >= threshold ("Yes") or <= 1 - threshold ("No").
+# Everything else is ambiguous and goes to the remote judge.
+
+FAST_PATH_TIERS = ["exact", "metric", "llm"]
+
+
+def normalize_answer(text) -> str:
+    text = str(text).strip().lower()
+    text = re.sub(r"^answer:\s*", "", text).rstrip(".").strip()
+    text = re.sub(r"\bchromosome\s+", "chr", text)
+    return re.sub(r"\s+", " ", text)
+
+
+def is_symbol_list(text: str) -> bool:
+    """True for predictions like "PSMB10" or "KRT12, KRT3", not free text."""
+    items = [item.strip() for item in re.split(r"[,;]", text)]
+    return all(item and " " not in item for item in items)
+
+
+def symbol_set_score(pred: str, true: str) -> Optional[float]:
+    if not is_symbol_list(pred):
+        return None
+    return f1_score_set(pred, true)
+
+
+def location_score(pred: str, true: str) -> Optional[float]:
+    true_loci = extract_chrom_loci(true)
+    if not true_loci:
+        return None
+    return fuzzy_location_score(pred, true_loci)
+
+
+def yes_no_score(pred: str, true: str) -> Optional[float]:
+    # Gold answers are "TRUE" for protein-coding genes and "NA" (or blank)
+    # otherwise
+    verdict = re.match(r"(yes|no)\b", pred)
+    if verdict is None or true not in ("true", "na", ""):
+        return None
+    return float((verdict.group(1) == "yes") == (true == "true"))
+
+
+SPECIES_NAMES = {
+    "caenorhabditis elegans": "worm",
+    "homo sapiens": "human",
+    "danio rerio": "zebrafish",
+    "mus musculus": "mouse",
+    "saccharomyces cerevisiae": "yeast",
+    "rattus norvegicus": "rat",
+    "gallus gallus": "chicken",
+}
+
+
+def species_score(pred: str, true: str) -> Optional[float]:
+    """Decides only when the prediction names exactly one species."""
+    named = {
+        common
+        for latin, common in SPECIES_NAMES.items()
+        if latin in pred or re.search(rf"\b{common}\b", pred)
+    }
+    if len(named) != 1:
+        return None
+    return float(named == {true})
+
+
+def chromosome_score(pred: str, true: str) -> Optional[float]:
+    """
+    "No" when no chromosome the prediction names is the gold one. A match
+    decides "Yes" only for chromosome-level gold answers ("chr8"); gold
+    coordinates still need the LLM to check the position.
+    """
+    true_chrom, _, position = true.partition(":")
+    named = {f"chr{c}" for c in re.findall(r"\bchr\s?([0-9]{1,2}|x|y)\b", pred)}
+    if not named:
+        return None
+    if true_chrom not in named:
+        return 0.0
+    return 1.0 if named == {true_chrom} and not position else None
+
+
+FAST_PATH_METRICS: Dict[str, Callable[[str, str], Optional[float]]] = {
+    "Gene alias": symbol_set_score,
+    "Gene name conversion": symbol_set_score,
+    "Gene SNP association": symbol_set_score,
+    "Gene location": chromosome_score,
+    "SNP location": chromosome_score,
+    "Gene disease association": symbol_set_score,
+    "sequence gene alias": symbol_set_score,
+    "Disease gene location": location_score,
+    "Protein-coding genes": yes_no_score,
+    "Multi-species DNA aligment": species_score,
+    "Human genome DNA aligment": chromosome_score,
+}
+
+
+def fast_path_judgment(
+    task: Optional[str], answer, prediction, threshold: float = 0.9
+) -> Tuple[str, Optional[str]]:
+    """(tier, judgment) for one row; judgment is None when the LLM must decide."""
+    pred, true = normalize_answer(prediction), normalize_answer(answer)
+    if pred.startswith("[error]"):
+        return "metric", "No. The model returned an error instead of an answer."
+    if exact_match(pred, true):
+        return "exact", "Yes. The prediction exactly matches the expected answer."
+
+    metric = FAST_PATH_METRICS.get(task)
+    score = metric(pred, true) if metric is not None else None
+    if score is not None and score >= threshold:
+        return "metric", f"Yes. {metric.__name__} = {score:.2f}."
+    if score is not None and score <= 1 - threshold:
+        return "metric", f"No. {metric.__name__} = {score:.2f}."
+    return "llm", None
+
+
+def fast_path_dataframe(
+    df: pd.DataFrame, threshold: float = 0.9
+) -> Tuple[List[str], List[Optional[str]]]:
+    """Tier and fast-path judgment for every row of `df`."""
+    tasks = df["task"] if "task" in df else [None] * len(df)
+    results = [
+        fast_path_judgment(task, answer, prediction, threshold)
+        for task, answer, prediction in zip(tasks, df["answer"], df["prediction"])
+    ]
+    return [tier for tier, _ in results], [judgment for _, judgment in results]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="LLM-as-a-Judge evaluation for CSV results."
+    )
+    parser.add_argument(
+        "--input_csv", required=True, help="Path to input result CSV file"
+    )
+    parser.add_argument(
+        "--output_csv",
+        default="judge_output.csv",
+        help="Path to output judged CSV file",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=16, help="Maximum concurrent judge requests"
+    )
+    parser.add_argument(
+        "--initial_rps",
+        type=float,
+        default=5.0,
+        help="Starting request rate; adapts to 429/Retry-After responses",
+    )
+    parser.add_argument(
+        "--max_rps", type=float, default=50.0, help="Upper bound on the request rate"
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=1,
+        help="Rows graded per request (1 = one prompt per row)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.9,
+        help="Metric score at which the fast path decides without the LLM",
+    )
+    parser.add_argument(
+        "--no_fast_path",
+        action="store_true",
+        help="Send every row to the LLM judge",
+    )
+    parser.add_argument(
+        "--cache",
+        default="judge_cache.sqlite",
+        help="Persistent judgment cache; already-judged rows are skipped",
+    )
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.input_csv, keep_default_na=False)
+
+    if args.no_fast_path:
+        tiers, judgments = ["llm"] * len(df), [None] * len(df)
+    else:
+        tiers, judgments = fast_path_dataframe(df, args.threshold)
+    df["judge_tier"] = tiers
+    df["llm_judgment"] = judgments
+    ambiguous = df["judge_tier"] == "llm"
+
+    cache = ResponseCache(args.cache) if args.cache else None
+    limiter = AdaptiveRateLimiter(args.initial_rps, args.max_rps)
+    if args.batch_size > 1:
+        llm_judgments, stats = judge_dataframe_batched(
+            df[ambiguous], args.batch_size, args.workers, limiter, cache
+        )
+        print(
+            f"Batch size {args.batch_size}: {stats.requests} requests, "
+            f"{stats.splits} splits, "
+            f"{stats.tokens_per_verdict():.1f} tokens per verdict"
+        )
+    else:
+        llm_judgments = judge_dataframe(df[ambiguous], args.workers, limiter, cache)
+    df.loc[ambiguous, "llm_judgment"] = llm_judgments
+    df.to_csv(args.output_csv, index=False)
+    print(f"✅ Judged results saved to {args.output_csv}")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Skipped {stats['cache_hits']} already-judged rows")
+    print(f"Throttled responses: {limiter.throttled}, final rate {limiter.rate:.1f}/s")
+    resolved = df["judge_tier"].value_counts(normalize=True)
+    for tier in FAST_PATH_TIERS:
+        print(f"Resolved by {tier}: {resolved.get(tier, 0.0):.1%}")
+
+
+if __name__ == "__main__":
+    main()
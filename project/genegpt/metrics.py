@@ -0,0 +1,72 @@
+import re
+from typing import List, Union
+
+
+def exact_match(pred, true):
+    pred_str = str(pred).strip().lower()
+    true_str = str(true).strip().lower()
+    return pred_str == true_str
+
+
+def f1_score_set(pred: Union[str, List[str]], true: Union[str, List[str]]) -> float:
+    if isinstance(pred, str):
+        pred = re.split(r"[,;]", pred)
+    if isinstance(true, str):
+        true = re.split(r"[,;]", true)
+
+    pred_set = set(map(str.strip, pred))
+    true_set = set(map(str.strip, true))
+
+    if not pred_set and not true_set:
+        return 1.0
+    if not pred_set or not true_set:
+        return 0.0
+
+    tp = len(pred_set & true_set)
+    precision = tp / len(pred_set)
+    recall = tp / len(true_set)
+    return (
+        2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+    )
+
+
+def extract_chrom_loci(text: str) -> List[str]:
+    """
+    Extract all chromosome loci strings like '17q21.31' or '6p12' from a text.
+    """
+    return re.findall(r"\d{1,2}[pq]\d+(?:\.\d+)?", text)
+
+
+def fuzzy_location_score(pred: Union[str, List[str]], true: List[str]) -> float:
+    """
+    Scoring function for 'Disease gene location'. Gives credit for correct loci,
+    penalizes extra irrelevant loci.
+
+    Args:
+        pred (str | List[str]): predicted string or list of loci
+        true (List[str]): gold standard loci
+
+    Returns:
+        float: score in [0, 1]
+    """
+    if isinstance(pred, str):
+        pred_loci = extract_chrom_loci(pred)
+    else:
+        pred_loci = pred
+
+    pred_loci = set(pred_loci)
+    true_loci = set(true)
+
+    true_positives = len(pred_loci & true_loci)
+    false_positives = len(pred_loci - true_loci)
+
+    if len(true_loci) == 0:
+        return 1.0 if len(pred_loci) == 0 else 0.0
+
+    precision = true_positives / (true_positives + false_positives + 1e-8)
+    recall = true_positives / len(true_loci)
+
+    # F1 score with soft penalty for hallucination
+    if precision + recall == 0:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
@@ -0,0 +1,448 @@
+import gzip
+import os
+import re
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .blast_jobs import BlastError
+from .blast_jobs import get_manager as get_blast_manager
+from .eutils import get_client
+from .gene_index import get_gene_index
+from .tracing import span
+
+
+def extract_rid_simple(response_bytes):
+    """Extracts an NCBI BLAST Request ID (RID) from a byte string."""
+    if not response_bytes:
+        return None
+    match = re.search(
+        r"RID\s*=\s*([A-Z0-9]+)", response_bytes.decode("utf-8", errors="ignore")
+    )
+    return match.group(1).strip() if match else None
+
+
+def blast_sequence(sequence, hitlist_size=5):
+    """Submit a DNA sequence to NCBI BLAST and retrieve results."""
+    manager = get_blast_manager()
+    try:
+        future = manager.submit(sequence, hitlist_size)
+        with span("blast.wait"):
+            return future.result(timeout=manager.timeout)
+    except BlastError as e:
+        return str(e)
+    except TimeoutError:
+        return "Timed out waiting for BLAST results."
+
+
+def prefetch_blast(sequences: List[str]) -> None:
+    """
+    Start alignments for `sequences` without waiting, so later lookups for
+    them overlap their queue time with other work (no-op for local backends).
+    """
+    get_alignment_backend().prefetch(sequences)
+
+
+def extract_dna_sequence(text: str) -> Optional[str]:
+    """Return the longest run of nucleotides (>= 20 bp) in a question, if any."""
+    runs = re.findall(r"[ACGTN]{20,}", text)
+    return max(runs, key=len) if runs else None
+
+
+def get_official_symbol_from_alias(alias, email, api_key):
+    """Find official gene symbol from alias using NCBI Entrez esearch + esummary."""
+    index = get_gene_index()
+    if index is not None:
+        symbols = index.official_symbols(alias)
+        if symbols:
+            return symbols
+
+    client = get_client()
+
+    esearch_params = {
+        "db": "gene",
+        "retmax": 3,
+        "term": alias,
+        "email": email,
+        "api_key": api_key,
+    }
+    search_resp = client.get_json("esearch.fcgi", esearch_params)
+    id_list = search_resp.get("esearchresult", {}).get("idlist", [])
+    if not id_list:
+        return []
+
+    esummary_params = {
+        "db": "gene",
+        "id": ",".join(id_list),
+        "email": email,
+        "api_key": api_key,
+    }
+    summary_resp = client.get_json("esummary.fcgi", esummary_params)
+    summaries = summary_resp.get("result", {})
+    summaries.pop("uids", None)
+    return [summaries[uid]["name"] for uid in summaries if "name" in summaries[uid]]
+
+
+def get_gene_uid(symbols: List[str]) -> List[str]:
+    index = get_gene_index()
+    if index is not None:
+        uids = index.gene_ids(symbols)
+        if uids:
+            return uids
+
+    params = {"db": "gene", "term": " OR ".join(symbols)}
+    uids = get_client().get_json("esearch.fcgi", params)["esearchresult"]["idlist"]
+    return uids  # might be multiple UIDs
+
+
+def get_gene_aliases(uids: list[str]) -> list[str]:
+    if not uids:
+        return []
+
+    index = get_gene_index()
+    data = index.summaries(uids) if index is not None else {}
+
+    # Fall back to esummary only if the offline index is missing some genes
+    if len(data) < len(uids):
+        uid_str = ",".join(uids)
+        params = {"db": "gene", "id": uid_str}
+
+        try:
+            data = get_client().get_json("esummary.fcgi", params).get("result", {})
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch gene aliases: {e}")
+            return []
+
+    return aliases_from_summaries(uids, data)
+
+
+def aliases_from_summaries(uids: List[str], data: Dict[str, dict]) -> List[str]:
+    """Other aliases plus the official name of every gene in `uids`, sorted."""
+    aliases = set()
+    for uid in uids:
+        item = data.get(uid)
+        if not item:
+            continue
+        # Safely get alias list and official name
+        alias_str = item.get("otheraliases", "")
+        aliases.update(a.strip() for a in alias_str.split(",") if a.strip())
+        official_name = item.get("name")
+        if official_name:
+            aliases.add(official_name)
+    # Sorted so the prompt built from them does not vary between runs
+    return sorted(aliases)
+
+
+def extract_gene_symbols_from_blast(blast_text: str):
+    """
+    Extracts gene symbols from BLAST alignment section using parentheses at the end of description lines.
+    """
+    gene_symbols = set()
+    for line in blast_text.splitlines():
+        match = re.search(r"\(([^)]+)\)", line)
+        if match:
+            symbol = match.group(1).strip()
+            # Basic filter: uppercase, not numeric, not LOC*
+            if (
+                symbol.isupper()
+                and not symbol.startswith("LOC")
+                and not symbol.isdigit()
+            ):
+                gene_symbols.add(symbol)
+    return list(gene_symbols)
+
+
+# === Alignment backends ===
+# Sequence questions are resolved by aligning the query and reading gene
+# symbols out of the hit descriptions. The backend is chosen with the
+# BLAST_BACKEND environment variable ("remote", "local" or "kmer") or
+# set_alignment_backend().
+
+
+class RemoteBlastBackend:
+    """NCBI web BLAST (blastn/megablast against nt) via the shared job manager."""
+
+    def __init__(self, hitlist_size: int = 5) -> None:
+        self.hitlist_size = hitlist_size
+
+    def prefetch(self, sequences: List[str]) -> None:
+        get_blast_manager().submit_many(sequences, self.hitlist_size)
+
+    def gene_symbols(self, sequence: str) -> List[str]:
+        return extract_gene_symbols_from_blast(
+            blast_sequence(sequence, self.hitlist_size)
+        )
+
+
+class LocalBlastBackend:
+    """
+    BLAST+ `blastn` against a local nucleotide database built with
+    `makeblastdb -parse_seqids`, whose titles keep the "(SYMBOL)" suffix.
+    """
+
+    def __init__(self, db: str, blastn: str = "blastn", hitlist_size: int = 5) -> None:
+        self.db = db
+        self.blastn = blastn
+        self.hitlist_size = hitlist_size
+
+    def prefetch(self, sequences: List[str]) -> None:
+        pass
+
+    def gene_symbols(self, sequence: str) -> List[str]:
+        proc = subprocess.run(
+            [
+                self.blastn,
+                "-task",
+                "megablast",
+                "-db",
+                self.db,
+                "-outfmt",
+                "6 stitle",
+                "-max_target_seqs",
+                str(self.hitlist_size),
+            ],
+            input=f">query\n{sequence}\n",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return extract_gene_symbols_from_blast(proc.stdout)
+
+
+def read_fasta(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (header, sequence) records from a plain or gzipped FASTA file."""
+    opener = gzip.open if path.endswith(".gz") else open
+    header, chunks = None, []
+    with opener(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(chunks).upper()
+                header, chunks = line[1:], []
+            elif line:
+                chunks.append(line)
+    if header is not None:
+        yield header, "".join(chunks).upper()
+
+
+def reverse_complement(sequence: str) -> str:
+    return sequence.translate(str.maketrans("ACGTN", "TGCAN"))[::-1]
+
+
+class KmerIndexBackend:
+    """
+    In-process k-mer index over a local FASTA of transcripts.
+
+    Every `stride`-th k-mer of each reference is indexed; a query is scored
+    by how many of its k-mers (both strands) hit each reference, and the
+    best `hitlist_size` headers are parsed like BLAST description lines.
+    Any exact match of at least k + stride - 1 bases is guaranteed a hit.
+    """
+
+    def __init__(
+        self, fasta_path: str, k: int = 20, stride: int = 8, hitlist_size: int = 5
+    ) -> None:
+        self.k = k
+        self.hitlist_size = hitlist_size
+        self.headers: List[str] = []
+        self.index: Dict[str, List[int]] = defaultdict(list)
+        for ref_id, (header, seq) in enumerate(read_fasta(fasta_path)):
+            self.headers.append(header)
+            for i in range(0, len(seq) - k + 1, stride):
+                postings = self.index[seq[i : i + k]]
+                if not postings or postings[-1] != ref_id:
+                    postings.append(ref_id)
+
+    def prefetch(self, sequences: List[str]) -> None:
+        pass
+
+    def gene_symbols(self, sequence: str) -> List[str]:
+        sequence = sequence.upper()
+        hits: Counter = Counter()
+        for strand in (sequence, reverse_complement(sequence)):
+            for i in range(len(strand) - self.k + 1):
+                hits.update(self.index.get(strand[i : i + self.k], ()))
+        best = hits.most_common(self.hitlist_size)
+        top = [self.headers[ref_id] for ref_id, _ in best]
+        return extract_gene_symbols_from_blast("\n".join(top))
+
+
+_alignment_backend = None
+
+
+def get_alignment_backend():
+    """Return the configured alignment backend (remote NCBI BLAST by default)."""
+    global _alignment_backend
+    if _alignment_backend is None:
+        kind = os.getenv("BLAST_BACKEND", "remote")
+        if kind == "local":
+            _alignment_backend = LocalBlastBackend(os.environ["BLAST_DB"])
+        elif kind == "kmer":
+            _alignment_backend = KmerIndexBackend(os.environ["BLAST_FASTA"])
+        else:
+            _alignment_backend = RemoteBlastBackend()
+    return _alignment_backend
+
+
+def set_alignment_backend(backend) -> None:
+    global _alignment_backend
+    _alignment_backend = backend
+
+
+def snp_gene_name(summary: dict) -> Optional[str]:
+    """First gene symbol from a dbSNP esummary record, if the SNP is in a gene."""
+    genes = summary.get("genes") or []
+    if genes:
+        return genes[0].get("name")
+    return summary.get("genename") or None
+
+
+def get_gene_from_snp(snp_id: str) -> str:
+    uid = snp_id.replace("rs", "")
+    params = {"db": "snp", "id": uid}
+    doc = get_client().get_json("esummary.fcgi", params)
+    try:
+        # esummary keys records by the numeric uid, without the "rs" prefix
+        return snp_gene_name(doc["result"][uid])
+    except Exception:
+        return None
+
+
+def get_gene_locations_by_disease(disease_name: str) -> dict:
+    client = get_client()
+
+    # Step 1: Search gene linked to disease
+    esearch_params = {"db": "gene", "term": disease_name}
+    search_resp = client.get_json("esearch.fcgi", esearch_params)
+    gene_ids = search_resp["esearchresult"]["idlist"]
+
+    # Step 2: Get gene summaries including chromosomal location
+    if not gene_ids:
+        return {}
+
+    index = get_gene_index()
+    summaries = index.summaries(gene_ids) if index is not None else {}
+    if len(summaries) < len(gene_ids):
+        esummary_params = {"db": "gene", "id": ",".join(gene_ids)}
+        summaries = client.get_json("esummary.fcgi", esummary_params)["result"]
+
+    locations = {}
+    for gid in gene_ids:
+        item = summaries.get(gid)
+        if item:
+            locations[item["name"]] = item.get("maplocation", "unknown")
+
+    return locations
+
+
+def build_ncbi_info(
+    dna_seq: str, disease: str = None, snp: str = None, lookup=None
+) -> dict:
+    """
+    Collect NCBI facts for a question. `lookup` is an optional prefetched
+    NCBILookup (see ncbi_prefetch) consulted before any live request; live
+    answers are added to it so later questions about the same SNP, disease or
+    gene reuse them.
+    """
+    ncbi_info = {}
+
+    # If you have a DNA sequence, run BLAST to find the gene
+    if dna_seq:
+        gene_symbols = get_alignment_backend().gene_symbols(dna_seq)
+        if gene_symbols:
+            ncbi_info["gene"] = gene_symbols[0]  # assume first is best hit
+            ncbi_info["aliases"] = lookup_gene_aliases(gene_symbols[0], lookup)
+
+    # If it's a disease -> gene location task
+    if disease:
+        if lookup is not None and disease in lookup.disease_locations:
+            gene_locs = lookup.disease_locations[disease]
+        else:
+            gene_locs = get_gene_locations_by_disease(disease)
+            if lookup is not None:
+                lookup.disease_locations[disease] = gene_locs
+        ncbi_info["location"] = gene_locs
+
+    # If it's an SNP query (like "What gene is associated with SNP rsXXXX?")
+    if snp:
+        if lookup is not None and snp in lookup.snp_genes:
+            snp_gene = lookup.snp_genes[snp]
+        else:
+            snp_gene = get_gene_from_snp(snp)
+            if lookup is not None:
+                lookup.snp_genes[snp] = snp_gene
+        ncbi_info["gene"] = snp_gene
+        if snp_gene:
+            ncbi_info["aliases"] = lookup_gene_aliases(snp_gene, lookup)
+
+    return ncbi_info
+
+
+def lookup_gene_aliases(symbol: str, lookup=None) -> List[str]:
+    if lookup is not None and symbol in lookup.gene_aliases:
+        return lookup.gene_aliases[symbol]
+    aliases = get_gene_aliases(get_gene_uid([symbol]))
+    if lookup is not None:
+        lookup.gene_aliases[symbol] = aliases
+    return aliases
+
+
+def extract_snp_id(text: str) -> Optional[str]:
+    match = re.search(r"\brs\d+\b", text)
+    return match.group(0) if match else None
+
+
+def extract_disease(text: str) -> Optional[str]:
+    """
+    Pull the disease name out of a "What are genes related to X?" or
+    "... the genes related to X. Let's decompose ..." question.
+    """
+    match = re.search(r"related to (.+?)(?:\?|\.(?:\s|$))", text)
+    return " ".join(match.group(1).split()) if match else None
+
+
+def dispatch_ncbi_data(task: str, question: str, lookup=None) -> dict:
+    if task == "sequence gene alias":
+        dna_seq = extract_dna_sequence(question) or question
+        return build_ncbi_info(dna_seq=dna_seq, lookup=lookup)  # BLAST-based
+    elif task == "Disease gene location":
+        disease = extract_disease(question) or question
+        return build_ncbi_info(dna_seq=None, disease=disease, lookup=lookup)
+    elif task == "SNP gene function":
+        snp = extract_snp_id(question) or question
+        return build_ncbi_info(dna_seq=None, snp=snp, lookup=lookup)  # use SNP info
+    else:
+        return {}
+
+
+def format_ncbi_data(ncbi_info: dict) -> str:
+    lines = []
+
+    if "gene" in ncbi_info:
+        lines.append(f"The gene identified is {ncbi_info['gene']}.")
+
+    if "aliases" in ncbi_info:
+        alias_str = ", ".join(ncbi_info["aliases"])
+        lines.append(f"Its known aliases include: {alias_str}.")
+
+    if "location" in ncbi_info and isinstance(ncbi_info["location"], dict):
+        locs = [
+            f"{gene}: Chromosome {loc}" for gene, loc in ncbi_info["location"].items()
+        ]
+        loc_str = "; ".join(locs)
+        lines.append(f"The following gene locations were found: {loc_str}.")
+
+    return " ".join(lines)
+
+
+if __name__ == "__main__":
+    # Example usage (live BLAST and E-utilities calls)
+    dna_seq = "GTAGATGGAACTGGTAGTCAGCTGGAGAGCAGCATGGAGGCGTCCTGGGGGAGCTTCAACGCTGAGCGGGGCTGGTATGTCTCTGTCCAGCAGCCTGAAGAAGCGGAGGCCGA"
+    blast_result = blast_sequence(dna_seq)
+    gene_symbols = extract_gene_symbols_from_blast(blast_result)
+    uids = get_gene_uid(gene_symbols)
+    aliases = get_gene_aliases(uids)
+    # print(gene_symbols)
+    # print(uids)
+    # print(aliases)
@@ -0,0 +1,124 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .eutils import get_client
+from .gene_index import get_gene_index
+from .ncbi_info import (
+    aliases_from_summaries,
+    extract_disease,
+    extract_snp_id,
+    get_gene_uid,
+    snp_gene_name,
+)
+
+ESUMMARY_CHUNK = 200
+
+
+@dataclass
+class NCBILookup:
+    """
+    NCBI facts by SNP id, gene symbol and disease term. `dispatch_ncbi_data`
+    reads them before going live and adds what it had to fetch live.
+    """
+
+    snp_genes: Dict[str, Optional[str]] = field(default_factory=dict)
+    gene_aliases: Dict[str, List[str]] = field(default_factory=dict)
+    disease_locations: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+
+def chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def esummary_many(db: str, uids: List[str]) -> Dict[str, dict]:
+    """esummary records for `uids`, fetched ESUMMARY_CHUNK ids per POST."""
+    client = get_client()
+    records: Dict[str, dict] = {}
+    for chunk in chunks(sorted(set(uids)), ESUMMARY_CHUNK):
+        result = client.post_json("esummary.fcgi", {"db": db, "id": ",".join(chunk)})
+        result = result.get("result", {})
+        result.pop("uids", None)
+        records.update(result)
+    return records
+
+
+def prefetch_snp_genes(snp_ids: List[str]) -> Dict[str, Optional[str]]:
+    records = esummary_many("snp", [s.replace("rs", "") for s in snp_ids])
+    return {
+        snp: snp_gene_name(records.get(snp.replace("rs", ""), {})) for snp in snp_ids
+    }
+
+
+def prefetch_gene_aliases(symbols: List[str]) -> Dict[str, List[str]]:
+    """
+    The aliases `lookup_gene_aliases` would find live for each symbol: the
+    same gene search per symbol (so the same ids, in the same ranking), then
+    one chunked esummary pass over the union of their ids.
+    """
+    uids = {symbol: get_gene_uid([symbol]) for symbol in symbols}
+    all_uids = sorted({uid for ids in uids.values() for uid in ids})
+    index = get_gene_index()
+    records = index.summaries(all_uids) if index is not None else {}
+    missing = [uid for uid in all_uids if uid not in records]
+    if missing:
+        records.update(esummary_many("gene", missing))
+    return {
+        symbol: aliases_from_summaries(ids, records) for symbol, ids in uids.items()
+    }
+
+
+def prefetch_disease_locations(diseases: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    One esearch per disease term, then a single chunked esummary pass over
+    the union of their gene ids.
+    """
+    client = get_client()
+    disease_ids: Dict[str, List[str]] = {}
+    for disease in diseases:
+        search = client.get_json("esearch.fcgi", {"db": "gene", "term": disease})
+        disease_ids[disease] = search["esearchresult"]["idlist"]
+
+    records = esummary_many(
+        "gene", [gid for ids in disease_ids.values() for gid in ids]
+    )
+    locations: Dict[str, Dict[str, str]] = {}
+    for disease, ids in disease_ids.items():
+        locations[disease] = {
+            records[gid]["name"]: records[gid].get("maplocation", "unknown")
+            for gid in ids
+            if gid in records
+        }
+    return locations
+
+
+def prefetch_ncbi_data(df: pd.DataFrame) -> NCBILookup:
+    """
+    Scan a GeneHop dataframe and resolve every SNP id, SNP gene and disease
+    term it mentions. esummary calls are batched ESUMMARY_CHUNK ids at a time;
+    gene and disease esearches run once per distinct term, as the live lookup
+    does, since an OR-ed search cannot reproduce each term's own ranking.
+    """
+    snp_ids = set()
+    diseases = set()
+    for task, question in zip(df["task"], df["question"]):
+        if task == "SNP gene function":
+            snp_id = extract_snp_id(question)
+            if snp_id:
+                snp_ids.add(snp_id)
+        elif task == "Disease gene location":
+            disease = extract_disease(question)
+            if disease:
+                diseases.add(disease)
+
+    lookup = NCBILookup()
+    if snp_ids:
+        lookup.snp_genes = prefetch_snp_genes(sorted(snp_ids))
+    symbols = sorted({gene for gene in lookup.snp_genes.values() if gene})
+    if symbols:
+        lookup.gene_aliases = prefetch_gene_aliases(symbols)
+    if diseases:
+        lookup.disease_locations = prefetch_disease_locations(sorted(diseases))
+    return lookup
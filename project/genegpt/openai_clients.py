@@ -0,0 +1,393 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+
+from .throttle import estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI, AzureOpenAI
+
+# Connection pool shared by every request this process makes to Azure OpenAI
+MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "64"))
+MAX_KEEPALIVE = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE", "32"))
+KEEPALIVE_EXPIRY = 120.0
+# In-flight requests allowed per deployment, across all threads/tasks
+DEPLOYMENT_CONCURRENCY = int(os.getenv("AZURE_OPENAI_DEPLOYMENT_CONCURRENCY", "16"))
+
+DEPLOYMENT_PATH = re.compile(r"/deployments/([^/]+)/")
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _deployment(request: httpx.Request) -> str:
+    match = DEPLOYMENT_PATH.search(request.url.path)
+    return match.group(1) if match else ""
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees its deployment slot once closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class DeploymentLimitedTransport(httpx.HTTPTransport):
+    """
+    Keep-alive transport that caps concurrent requests per deployment, read
+    from the /openai/deployments/<name>/ path the Azure SDK calls.
+    """
+
+    def __init__(self, concurrency: int = DEPLOYMENT_CONCURRENCY, **kwargs) -> None:
+        super().__init__(limits=_limits(), **kwargs)
+        self.concurrency = concurrency
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, deployment: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if deployment not in self._semaphores:
+                self._semaphores[deployment] = threading.BoundedSemaphore(
+                    self.concurrency
+                )
+            return self._semaphores[deployment]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphore(_deployment(request))
+        semaphore.acquire()
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is held until the body is closed, so streams count too
+        response.stream = _ReleasingStream(response.stream, semaphore.release)
+        return response
+
+
+class AsyncDeploymentLimitedTransport(httpx.AsyncHTTPTransport):
+    """
+    asyncio counterpart of `DeploymentLimitedTransport`. asyncio semaphores
+    belong to one event loop, so each running loop gets its own set.
+    """
+
+    def __init__(self, concurrency: int = DEPLOYMENT_CONCURRENCY, **kwargs) -> None:
+        super().__init__(limits=_limits(), **kwargs)
+        self.concurrency = concurrency
+        self._semaphores: WeakKeyDictionary = WeakKeyDictionary()
+
+    def _semaphore(self, deployment: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if deployment not in semaphores:
+            semaphores[deployment] = asyncio.Semaphore(self.concurrency)
+        return semaphores[deployment]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphore(_deployment(request))
+        await semaphore.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, semaphore.release)
+        return response
+
+
+_http_client: Optional[httpx.Client] = None
+_clients: Dict[tuple, "AzureOpenAI"] = {}
+# Async connections cannot outlive the event loop that opened them, so each
+# running loop gets its own pool and clients, dropped once the loop is gone
+_async_http_clients: WeakKeyDictionary = WeakKeyDictionary()
+_async_clients: WeakKeyDictionary = WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _settings(
+    azure_endpoint: Optional[str], api_version: Optional[str], api_key: Optional[str]
+) -> tuple:
+    # Set to route every client, including ones given an explicit endpoint,
+    # to a local stub (see fixture_server.py)
+    override = os.getenv("AZURE_OPENAI_ENDPOINT_OVERRIDE")
+    return (
+        override or azure_endpoint or os.getenv("AZURE_OPENAI_ENDPOINT"),
+        api_version or os.getenv("AZURE_OPENAI_API_VERSION"),
+        api_key or os.getenv("AZURE_OPENAI_KEY"),
+    )
+
+
+def get_client(
+    azure_endpoint: Optional[str] = None,
+    api_version: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> "AzureOpenAI":
+    """
+    Process-wide Azure OpenAI client; settings left as None come from the
+    AZURE_OPENAI_* environment variables. Clients for different endpoints share
+    one connection pool. Per-call settings should go through
+    `get_client().with_options(...)`, which reuses the same pool.
+    """
+    # openai takes ~0.5s to import, so it is loaded on first use
+    from openai import AzureOpenAI, DefaultHttpxClient
+
+    global _http_client
+    settings = _settings(azure_endpoint, api_version, api_key)
+    with _client_lock:
+        if settings not in _clients:
+            if _http_client is None:
+                _http_client = DefaultHttpxClient(
+                    transport=DeploymentLimitedTransport()
+                )
+            endpoint, version, key = settings
+            _clients[settings] = AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_version=version,
+                api_key=key,
+                http_client=_http_client,
+            )
+        return _clients[settings]
+
+
+def get_async_client(
+    azure_endpoint: Optional[str] = None,
+    api_version: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> "AsyncAzureOpenAI":
+    """
+    Async Azure OpenAI client for the running event loop, so it must be called
+    from a coroutine; see `get_client`. Clients on one loop share a pool.
+    """
+    from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+    loop = asyncio.get_running_loop()
+    settings = _settings(azure_endpoint, api_version, api_key)
+    with _client_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if settings not in clients:
+            if loop not in _async_http_clients:
+                _async_http_clients[loop] = DefaultAsyncHttpxClient(
+                    transport=AsyncDeploymentLimitedTransport()
+                )
+            endpoint, version, key = settings
+            clients[settings] = AsyncAzureOpenAI(
+                azure_endpoint=endpoint,
+                api_version=version,
+                api_key=key,
+                http_client=_async_http_clients[loop],
+            )
+        return clients[settings]
+
+
+# === Prompt layout ===
+# Provider-side prompt caching matches on the longest byte-identical prefix of
+# the request, so everything shared across questions goes first and the
+# per-question content goes last.
+
+
+class PromptPrefix:
+    """
+    Frozen system + few-shot messages. Every request built from one prefix
+    starts with the same bytes; only the final user message varies.
+    """
+
+    def __init__(self, *parts: List[Dict[str, Any]]) -> None:
+        # Fixed key order so the serialized JSON is identical on every call
+        self._messages = tuple(
+            {"role": m["role"], "content": m["content"]} for part in parts for m in part
+        )
+
+    @property
+    def sha256(self) -> str:
+        """Fingerprint of the prefix, to confirm runs shared the same one."""
+        return hashlib.sha256(
+            json.dumps(self._messages, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def messages(self, user_content: str) -> List[Dict[str, str]]:
+        return [dict(m) for m in self._messages] + [
+            {"role": "user", "content": user_content}
+        ]
+
+
+# === Token usage ===
+# query_model returns only text, so the usage of the call a thread just made
+# is parked here until the evaluator picks it up with take_usage().
+
+
+@dataclass
+class Usage:
+    # None when the API never reported it (a stream closed before its usage chunk)
+    prompt_tokens: Optional[int] = 0
+    completion_tokens: int = 0
+    cached_tokens: Optional[int] = 0
+
+
+_usage = threading.local()
+
+
+def record_usage(response: Any) -> None:
+    """Add a chat completion's token usage to this thread's running total."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    add_usage(
+        Usage(
+            usage.prompt_tokens or 0,
+            usage.completion_tokens or 0,
+            (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        )
+    )
+
+
+def add_usage(usage: Usage) -> None:
+    total = getattr(_usage, "value", None) or Usage()
+    total.prompt_tokens = _add_known(total.prompt_tokens, usage.prompt_tokens)
+    total.completion_tokens += usage.completion_tokens
+    total.cached_tokens = _add_known(total.cached_tokens, usage.cached_tokens)
+    _usage.value = total
+
+
+def _add_known(total: Optional[int], amount: Optional[int]) -> Optional[int]:
+    # One unreported call leaves the whole total unknown
+    return None if total is None or amount is None else total + amount
+
+
+def take_usage() -> Usage:
+    """Usage recorded on this thread since the last call (zero for cache hits)."""
+    value = getattr(_usage, "value", None) or Usage()
+    _usage.value = None
+    return value
+
+
+def usage_metrics(rows: Iterable[Any]) -> Dict[str, float]:
+    """
+    Run totals and prefix-cache hit rate over rows carrying usage fields.
+    Prompt and cached totals only cover rows whose usage was reported.
+    """
+    prompt = completion = cached = unreported = 0
+    for row in rows:
+        completion += row.completion_tokens
+        if row.prompt_tokens is None or row.cached_tokens is None:
+            unreported += 1
+            continue
+        prompt += row.prompt_tokens
+        cached += row.cached_tokens
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": cached,
+        "prompt_cache_hit_rate": cached / prompt if prompt else 0.0,
+        "usage_unreported_rows": unreported,
+    }
+
+
+# === Streaming ===
+# The answer is done once the "Answer:" line has some text and a newline;
+# anything the model writes after that is never read.
+
+ANSWER_LINE = re.compile(r"^Answer:[ \t]*\S[^\n]*\n", re.MULTILINE)
+
+
+@dataclass
+class StreamTiming:
+    ttft_s: Optional[float] = None
+    time_to_answer_s: Optional[float] = None
+
+
+def stream_answer(
+    client: "AzureOpenAI",
+    messages: List[Dict[str, str]],
+    config: Dict[str, Any],
+    include_usage: bool = False,
+) -> str:
+    """
+    Stream a chat completion and close it as soon as the Answer line is
+    complete. Returns the text received so far, for the usual answer parsing.
+
+    Time-to-first-token and time-to-answer are parked for `take_timing()`.
+    The final usage chunk only arrives on a full stream (and needs an API
+    version that supports stream_options), so a stream cut short records an
+    estimated completion_tokens and leaves prompt and cached tokens unknown.
+    """
+    extra = {"stream_options": {"include_usage": True}} if include_usage else {}
+    start = time.perf_counter()
+    ttft = None
+    text = ""
+    stopped_early = False
+    stream = client.chat.completions.create(
+        messages=messages, stream=True, **config, **extra
+    )
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                record_usage(chunk)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta and ttft is None:
+                ttft = time.perf_counter() - start
+            text += delta
+            if ANSWER_LINE.search(text):
+                stopped_early = True
+                break
+    finally:
+        stream.close()
+    elapsed = time.perf_counter() - start
+
+    if stopped_early or not include_usage:
+        add_usage(Usage(None, estimate_tokens(text), None))
+    _usage.timing = StreamTiming(ttft if ttft is not None else elapsed, elapsed)
+    return text.strip()
+
+
+def take_timing() -> StreamTiming:
+    """Timing of the last streamed call on this thread (empty if none)."""
+    timing = getattr(_usage, "timing", None) or StreamTiming()
+    _usage.timing = None
+    return timing
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+EVICT_EVERY = 100
+
+
+class CacheMissError(KeyError):
+    """Raised in replay-only mode when a request has no cached response."""
+
+
+class ResponseCache:
+    """
+    Content-addressed SQLite cache of chat-completion responses.
+
+    Entries are keyed by a SHA-256 of the request messages plus the sampling
+    config, so changing the prompt or any model parameter is a miss.
+    `max_entries` evicts least-recently-used rows and `max_age` (seconds) drops
+    stale ones. With `replay_only=True` a miss raises CacheMissError instead
+    of calling the model. `get_or_create_json` keeps the sub-results a prompt
+    is built from (NCBI lookups) in the same table, so a replay needs neither.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = None,
+        replay_only: bool = False,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(messages: List[Dict[str, Any]], config: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"messages": messages, "config": config},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self._lookup(key)
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return content
+
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (
+                self.max_age is not None and now - row[1] > self.max_age
+            ):
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, content: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            self._conn.commit()
+            self._puts += 1
+        # Trimming scans the table, so only do it every EVICT_EVERY writes
+        if self.max_entries is not None and self._puts % EVICT_EVERY == 0:
+            self.evict()
+
+    def get_or_create(
+        self,
+        messages: List[Dict[str, Any]],
+        config: Dict[str, Any],
+        create: Callable[[], str],
+    ) -> str:
+        """Return the cached response for this request, calling `create` on a miss."""
+        key = self.make_key(messages, config)
+        content = self.get(key)
+        if content is not None:
+            return content
+        if self.replay_only:
+            raise CacheMissError(f"No cached response for request {key[:12]}")
+        content = create()
+        self.put(key, content)
+        return content
+
+    def get_or_create_json(
+        self, kind: str, name: str, create: Callable[[], Any]
+    ) -> Any:
+        """
+        Cached JSON value of `kind` (e.g. "ncbi") for `name`, calling `create`
+        on a miss. Not counted in `stats()`, which is about model responses.
+        """
+        key = self.make_key([{"role": kind, "content": name}], {})
+        content = self._lookup(key)
+        if content is not None:
+            return json.loads(content)
+        if self.replay_only:
+            raise CacheMissError(f"No cached {kind} data for {name[:60]!r}")
+        value = create()
+        self.put(key, json.dumps(value, ensure_ascii=False))
+        return value
+
+    def evict(self) -> None:
+        """Drop entries older than `max_age` and trim to `max_entries`."""
+        with self._lock:
+            if self.max_age is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created < ?",
+                    (time.time() - self.max_age,),
+                )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN ("
+                    " SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
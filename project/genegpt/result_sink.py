@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, List, Set
+
+
+class ResultSink:
+    """
+    Append-only JSONL checkpoint of evaluation rows.
+
+    Each row is written and flushed as soon as it completes, so a crashed
+    run keeps everything finished so far. Opening with `resume=True` keeps
+    the existing file and `completed_ids()` tells the evaluator what to skip;
+    otherwise the file is started fresh.
+    """
+
+    def __init__(self, path: str, resume: bool = False) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Only rows from a resumed file are kept in memory; new rows go to disk
+        self._resumed: Dict[Any, Dict[str, Any]] = (
+            {r["id"]: r for r in read_jsonl(path)} if resume else {}
+        )
+        self._done: Set[Any] = {
+            row_id for row_id, r in self._resumed.items() if not _is_error(r)
+        }
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        # Start on a fresh line if the previous run died mid-write
+        if resume and self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def write(self, result: Any) -> None:
+        record = asdict(result) if is_dataclass(result) else dict(result)
+        line = json.dumps(record, ensure_ascii=False, default=_to_json)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            if _is_error(record):
+                self._done.discard(record["id"])
+            else:
+                self._done.add(record["id"])
+
+    def completed_ids(self) -> Set[Any]:
+        """Ids with a finished row; rows that ended in an [ERROR] are retried."""
+        with self._lock:
+            return set(self._done)
+
+    def resumed_records(self) -> Dict[Any, Dict[str, Any]]:
+        """Latest record per id from the file this sink resumed, if any."""
+        return dict(self._resumed)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _is_error(record: Dict[str, Any]) -> bool:
+    return str(record.get("prediction", "")).startswith("[ERROR]")
+
+
+def _to_json(value: Any) -> Any:
+    # numpy/pandas scalars (e.g. int64 row ids) expose .item()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Read a JSONL result file, ignoring a torn last line from a crash."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
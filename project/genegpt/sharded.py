@@ -0,0 +1,267 @@
+"""
+Split a GeneTuring / GeneHop run into deterministic shards, run each shard as
+its own worker process and merge the per-shard results.
+
+    # Four local workers; merges once every shard has finished
+    python -m genegpt sharded run geneturing --shards 4 --out-dir runs/gt -- \\
+        --workers 8 --cache responses.sqlite
+
+    # Or one batch job per shard (e.g. a SLURM array), then merge
+    python -m genegpt sharded plan geneturing --shards 16 --out-dir runs/gt
+    python -m genegpt sharded merge geneturing --shards 16 --out-dir runs/gt
+
+Shard i runs `genegpt <command> --shard i/N --resume` with its own results
+JSONL, so a failed shard is simply run again. The merge rescores the rows
+with the same code the single-process run uses, so task and overall scores
+match an unsharded run over the same rows. It checks every shard holds all
+of its rows (pass merge the same `-- --tasks/--limit-per-task` as the run);
+a shard that stopped part-way is listed under "missing" and merge fails.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from . import dataset
+from .dataset import Shard
+from .result_sink import read_jsonl
+
+# Directory holding the genegpt package, for the child processes' sys.path
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS = ("geneturing", "genehop")
+STARTERS = {
+    "geneturing": "starter_geneturing_openai",
+    "genehop": "starter_genehop_openai",
+}
+
+
+def results_path(out_dir: str, command: str, shard: Shard) -> str:
+    return os.path.join(
+        out_dir, f"{command}.shard-{shard.index}-of-{shard.count}.jsonl"
+    )
+
+
+def shard_argv(command: str, shard: Shard, out_dir: str, extra: List[str]) -> List[str]:
+    """Command line of one shard worker."""
+    return [
+        sys.executable,
+        "-m",
+        "genegpt",
+        command,
+        "--shard",
+        str(shard),
+        "--results-jsonl",
+        os.path.abspath(results_path(out_dir, command, shard)),
+        "--resume",
+        *extra,
+    ]
+
+
+def _shards(count: int) -> List[Shard]:
+    return [Shard(index, count) for index in range(count)]
+
+
+def _run_shard(
+    command: str, shard: Shard, out_dir: str, extra: List[str]
+) -> Tuple[Shard, int, float]:
+    log_path = os.path.join(
+        out_dir, f"{command}.shard-{shard.index}-of-{shard.count}.log"
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [PACKAGE_ROOT, os.getenv("PYTHONPATH")])
+        ),
+    }
+    start = time.perf_counter()
+    with open(log_path, "a") as log:
+        code = subprocess.call(
+            shard_argv(command, shard, out_dir, extra),
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return shard, code, time.perf_counter() - start
+
+
+def run(args: argparse.Namespace) -> int:
+    os.makedirs(args.out_dir, exist_ok=True)
+    shards = _shards(args.shards)
+    # Each worker is a separate process; the threads only wait on them
+    with ThreadPoolExecutor(max_workers=args.workers or len(shards)) as executor:
+        futures = [
+            executor.submit(_run_shard, args.command, shard, args.out_dir, args.extra)
+            for shard in shards
+        ]
+        failed = []
+        for future in futures:
+            shard, code, wall = future.result()
+            print(f"shard {shard}: exit {code} in {wall:.1f}s")
+            if code != 0:
+                failed.append(shard)
+
+    if failed:
+        print(
+            f"{len(failed)} shard(s) failed; see the .log files in {args.out_dir} "
+            "and run again to resume them"
+        )
+        return 1
+    return merge(args)
+
+
+def plan(args: argparse.Namespace) -> int:
+    """Print one command per shard, for submitting the shards as batch jobs."""
+    for shard in _shards(args.shards):
+        print(shlex.join(shard_argv(args.command, shard, args.out_dir, args.extra)))
+    return 0
+
+
+def load_records(out_dir: str, command: str, count: int) -> Dict[int, Dict[str, Any]]:
+    """Latest record per row id across every shard's results file, by id."""
+    missing = [
+        path
+        for path in (results_path(out_dir, command, s) for s in _shards(count))
+        if not os.path.exists(path)
+    ]
+    if missing:
+        raise FileNotFoundError(f"Missing shard results: {', '.join(missing)}")
+    records: Dict[int, Dict[str, Any]] = {}
+    for shard in _shards(count):
+        for record in read_jsonl(results_path(out_dir, command, shard)):
+            records[record["id"]] = record
+    return dict(sorted(records.items()))
+
+
+def merge_geneturing(
+    records: Dict[int, Dict[str, Any]],
+) -> Tuple[List[Any], Dict[str, float], float]:
+    from .starter_geneturing_openai import predictions_from_records, scored_results
+
+    df = pd.DataFrame.from_dict(records, orient="index")[["task", "question", "answer"]]
+    return scored_results(df, *predictions_from_records(records))
+
+
+def merge_genehop(
+    records: Dict[int, Dict[str, Any]],
+) -> Tuple[List[Any], Dict[str, float], float]:
+    from .starter_genehop_openai import Result, aggregate_scores
+
+    results = [Result(**record) for record in records.values()]
+    return (results, *aggregate_scores(results))
+
+
+MERGERS = {"geneturing": merge_geneturing, "genehop": merge_genehop}
+
+
+def expected_ids(command: str, count: int, extra: List[str]) -> Dict[Shard, List[int]]:
+    """
+    Row ids each shard should have finished, from the dataset and the row
+    selection in `extra` (the arguments the shards were run with).
+    """
+    starter = importlib.import_module(f".{STARTERS[command]}", __package__)
+    args = starter.build_parser().parse_args(extra)
+    df = dataset.load_dataframe(starter.DATA_PATH)
+    return {
+        shard: dataset.select_dataframe(
+            df, args.tasks, args.limit_per_task, shard
+        ).index.tolist()
+        for shard in _shards(count)
+    }
+
+
+def missing_ids(
+    expected: Dict[Shard, List[int]], records: Dict[int, Dict[str, Any]]
+) -> Dict[str, List[int]]:
+    """Expected row ids absent from `records`, by shard ("i/N")."""
+    missing = {
+        str(shard): [row_id for row_id in ids if row_id not in records]
+        for shard, ids in expected.items()
+    }
+    return {shard: ids for shard, ids in missing.items() if ids}
+
+
+def merge(args: argparse.Namespace) -> int:
+    try:
+        records = load_records(args.out_dir, args.command, args.shards)
+        expected = expected_ids(args.command, args.shards, args.extra)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    missing = missing_ids(expected, records)
+    results, task_scores, overall = MERGERS[args.command](records)
+
+    results_csv = os.path.join(args.out_dir, f"{args.command}_results.csv")
+    pd.DataFrame(results).to_csv(results_csv, index=False)
+    summary = {
+        "shards": args.shards,
+        "rows": len(results),
+        "errors": sum(str(r.prediction).startswith("[ERROR]") for r in results),
+        "overall_score": overall,
+        "task_scores": task_scores,
+        "missing": missing,
+    }
+    with open(os.path.join(args.out_dir, f"{args.command}_scores.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"Merged {len(results)} rows from {args.shards} shards into {results_csv}")
+    print(f" Overall score: {overall:.3f}")
+    for task, score in task_scores.items():
+        print(f"  - {task}: {score:.3f}")
+    if missing:
+        print(
+            f"Incomplete: {sum(map(len, missing.values()))} row(s) missing from "
+            f"shard(s) {', '.join(missing)}; run them again and merge"
+        )
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Run GeneTuring/GeneHop as N shard processes and merge them."
+    )
+    commands = parser.add_subparsers(dest="action", required=True)
+    for name, func, summary in [
+        ("run", run, "Run every shard locally, then merge"),
+        ("plan", plan, "Print the command of each shard"),
+        ("merge", merge, "Merge finished shards and rescore them"),
+    ]:
+        p = commands.add_parser(name, help=summary)
+        p.add_argument("command", choices=COMMANDS)
+        p.add_argument("--shards", type=int, required=True, help="Number of shards")
+        p.add_argument(
+            "--out-dir", required=True, help="Per-shard results, logs and merge"
+        )
+        if name == "run":
+            p.add_argument(
+                "--workers",
+                type=int,
+                default=None,
+                help="Shards to run at once (default: all of them)",
+            )
+        p.set_defaults(func=func)
+    parser.epilog = "Arguments after -- are passed to every shard unchanged."
+
+    argv = sys.argv[1:] if argv is None else argv
+    extra: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, extra = argv[:split], argv[split + 1 :]
+    args = parser.parse_args(argv)
+    args.extra = extra
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
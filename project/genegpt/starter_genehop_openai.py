@@ -0,0 +1,797 @@
+# 1.1 Place imports here
+import argparse
+import difflib
+import os
+import re
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+from . import dataset
+from .batch_runner import BatchRunner, PlaybackBatchClient, run_batch
+from .canonical import dedup_metrics, duplicate_of, question_key
+from .eutils import get_client as get_eutils_client
+from .gene_hop_no_ncbi import (
+    cache_gold_embeddings,
+    embedding_similarities,
+    embedding_similarity,
+)
+from .generation_profiles import GenerationProfiles, derive_profiles, usage_by_task
+from .metrics import f1_score_set, fuzzy_location_score
+from .ncbi_info import (
+    dispatch_ncbi_data,
+    extract_dna_sequence,
+    format_ncbi_data,
+    prefetch_blast,
+)
+from .ncbi_prefetch import NCBILookup, prefetch_ncbi_data
+from .openai_clients import PromptPrefix, add_usage
+from .openai_clients import get_client as get_openai_client
+from .openai_clients import (
+    record_usage,
+    stream_answer,
+    take_timing,
+    take_usage,
+    usage_metrics,
+)
+from .response_cache import CacheMissError, ResponseCache
+from .result_sink import ResultSink
+from .telemetry import TelemetrySink
+from .tracing import background_metrics
+from .tracing import enable as enable_tracing
+from .tracing import span, span_metrics, take_spans
+
+# 2.1 Data Configuration
+DATA_PATH = "../data/genehop.json"
+MLFLOW_EXPERIMENT = "s440914_1"
+
+# 2.2 Model Configuration
+
+# 2.3 Evaluation and Logging Configuration
+AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+
+MODEL_CONFIG = {
+    "max_tokens": 800,
+    "temperature": 1.0,
+    "top_p": 1.0,
+    "frequency_penalty": 0.0,
+    "presence_penalty": 0.0,
+    "model": AZURE_OPENAI_DEPLOYMENT_NAME,  # Loaded from env
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="GeneHop benchmark with Azure OpenAI.")
+    parser.add_argument(
+        "--cache", default=None, help="SQLite response cache path (default: no cache)"
+    )
+    parser.add_argument(
+        "--replay-only",
+        action="store_true",
+        help="Serve every request from --cache and fail on a miss",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=None,
+        help="Keep at most N cached responses, evicting the least recently used",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Treat cached responses older than this as misses and evict them",
+    )
+    parser.add_argument(
+        "--results-jsonl",
+        default="gene_hop_openai_results.jsonl",
+        help="Streaming checkpoint of results, written as each row finishes",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep --results-jsonl and skip rows already finished there",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Answer every question through one Batch API job instead of live calls",
+    )
+    parser.add_argument(
+        "--batch-deployment",
+        default=None,
+        help="Batch deployment to submit to (default: the live deployment)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream completions and stop reading once the Answer line is complete",
+    )
+    parser.add_argument(
+        "--fixed-generation",
+        action="store_true",
+        help="Use MODEL_CONFIG for every task instead of per-task generation profiles",
+    )
+    parser.add_argument(
+        "--batch-playback",
+        default=None,
+        help="Replay this recorded batch output file instead of calling the Batch API",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Time NCBI, BLAST, LLM and scoring stages per row (also GENEGPT_TRACE=1)",
+    )
+    dataset.add_arguments(parser)
+    # The GeneHop run has always been the first five questions of each task
+    parser.set_defaults(limit_per_task=5)
+    return parser
+
+
+# Set up by main(); importing this module has no side effects
+args: Optional[argparse.Namespace] = None
+client = None
+response_cache: Optional[ResponseCache] = None
+generation_profiles = GenerationProfiles(MODEL_CONFIG)
+
+
+# 4.2 Draft your own system prompt for our generic genomics question answering system.
+#     Replace the system message `content` below with your own.
+system_message = [
+    {
+        "role": "system",
+        "content": "Hello. "
+        "Your task is to use NCBI Web APIs to answer genomic questions."
+        "Please only answer the question concisely "
+        " don't generate to many other stuff."
+        " If you can specify the answer, please put it after word Answer. "
+        "If you are not sure about the answer, please try to be concise"
+        "If multiple genes are associated, list all their names and chromosome locations. Separate by comma."
+        " and give a brief guess based on the NCBI results.",
+    }
+]
+few_shot_examples = [
+    {
+        "role": "user",
+        "content": "What is the official gene symbol of LMP10?",
+    },
+    {
+        "role": "assistant",
+        "content": "The official gene symbol of LMP10 is PSMB10.",
+    },
+]
+
+
+# 4.4 Implement THE model function
+
+# Filled by prefetch_ncbi_data before the evaluation loop
+ncbi_lookup: Optional[NCBILookup] = None
+
+
+def ncbi_data_for(task: str, question: str) -> Dict:
+    """
+    NCBI data for a question (raw dict format). With a response cache it is
+    stored there too, so a replay makes no E-utilities or BLAST calls.
+    """
+
+    def lookup() -> Dict:
+        return dispatch_ncbi_data(task, question, lookup=ncbi_lookup)
+
+    if response_cache is None:
+        return lookup()
+    return response_cache.get_or_create_json("ncbi", f"{task}\n{question}", lookup)
+
+
+def model_fn(question: str, task: str, stream: bool = False) -> str:
+    """
+    Main function to get the model prediction based on task and question.
+    With `stream`, the completion is cut off once the Answer line is complete.
+    """
+    # Get NCBI info (raw dict format)
+    with span("ncbi"):
+        ncbi_data = ncbi_data_for(task, question)
+    return query_model(
+        client=client,
+        system_message=system_message,
+        few_shot_examples=few_shot_examples,
+        user_query=question,
+        ncbi_data=ncbi_data,
+        cache=response_cache,
+        config=generation_profiles.config(task),
+        instruction_task=task,
+        stream=stream,
+    )
+
+
+def query_model(
+    client,
+    system_message: List[Dict[str, Any]],
+    few_shot_examples: List[Dict[str, str]],
+    user_query: str,
+    ncbi_data: Optional[Dict] = None,
+    cache: Optional[ResponseCache] = None,
+    config: Optional[Dict[str, Any]] = None,
+    instruction_task: Optional[str] = None,
+    stream: bool = False,
+) -> str:
+    """
+    Query the language model with NCBI data prepended and few-shot examples.
+    If `cache` is given, identical requests are served from it instead of the API.
+    `config` overrides MODEL_CONFIG and `instruction_task` appends that task's
+    answer-format instruction from its generation profile. With `stream`, the
+    completion is streamed and cut off once the Answer line is complete.
+    """
+    config = config or MODEL_CONFIG
+    user_query = generation_profiles.user_content(
+        instruction_task, build_user_query(user_query, ncbi_data)
+    )
+
+    # Compose the message payload; per-question NCBI data goes in the final user
+    # message so the shared prefix stays byte-identical for prompt caching
+    messages = PromptPrefix(system_message, few_shot_examples).messages(user_query)
+
+    def create() -> str:
+        with span("llm"):
+            if stream:
+                return stream_answer(client, messages, config)
+            response = client.chat.completions.create(messages=messages, **config)
+        record_usage(response)
+        content = response.choices[0].message.content
+        return content.strip() if content else ""
+
+    # Call the model (or replay the cached response)
+    if cache is not None:
+        # A stream cut off after the Answer line is not the full completion, so
+        # it must not be replayed for a non-streamed request or vice versa
+        cache_config = {**config, "stream": True} if stream else config
+        response_content = cache.get_or_create(messages, cache_config, create)
+    else:
+        response_content = create()
+
+    return extract_answer(response_content)
+
+
+def build_user_query(question: str, ncbi_data: Optional[Dict] = None) -> str:
+    # Format NCBI data if present and attach to query
+    if ncbi_data:
+        ncbi_text = format_ncbi_data(ncbi_data)
+        return f"NCBI Data: {ncbi_text}\nQuestion: {question}"
+    return question
+
+
+def extract_answer(response_content: str) -> str:
+    # Try to parse "Answer: ..." from model output
+    match = re.search(r"(?i)answer\s*:\s*(.*)", response_content)
+    return match.group(1).strip() if match else response_content
+
+
+def batch_model_fn(
+    df: pd.DataFrame,
+    runner: BatchRunner,
+    profiles: GenerationProfiles,
+    prefetch: bool = True,
+) -> Callable[[str, str], str]:
+    """
+    Answer every row of `df` in one Batch API job up front and return a
+    `model_fn` that serves those answers, so `evaluate_dataset` scores them
+    exactly as it scores live predictions. `prefetch` starts the BLAST
+    searches before the prompts are built.
+    """
+    prefix = PromptPrefix(system_message, few_shot_examples)
+    # evaluate_dataset only asks for the first occurrence of a question
+    df = df.drop(index=list(duplicate_of(df)))
+    if prefetch:
+        # The prompts need every BLAST result, so start them all before any
+        sequence_questions = df.loc[df["task"] == "sequence gene alias", "question"]
+        prefetch_blast([extract_dna_sequence(q) or q for q in sequence_questions])
+
+    def make_messages(row) -> List[Dict[str, str]]:
+        # A failed lookup raises here; run_batch turns it into that row's error
+        ncbi_data = ncbi_data_for(row["task"], row["question"])
+        user_query = build_user_query(row["question"], ncbi_data)
+        return prefix.messages(profiles.user_content(row["task"], user_query))
+
+    outputs = run_batch(
+        df,
+        make_messages,
+        lambda row: profiles.config(row["task"]),
+        runner,
+        cache=response_cache,
+        name="gene_hop",
+    )
+    answers = {
+        (df.at[idx, "task"], df.at[idx, "question"]): output
+        for idx, output in outputs.items()
+    }
+
+    def answer(question: str, task: str) -> str:
+        content, usage = answers[(task, question)]
+        add_usage(usage)
+        if content.startswith("[ERROR]"):
+            raise RuntimeError(content[len("[ERROR] ") :])
+        return extract_answer(content)
+
+    return answer
+
+
+# 5.1 Implement metrics
+
+
+def token_overlap(pred: str, true: str) -> float:
+    pred_tokens = set(pred.lower().split())
+    true_tokens = set(true.lower().split())
+    return len(pred_tokens & true_tokens) / len(true_tokens) if true_tokens else 1.0
+
+
+def normalized_levenshtein(pred: str, true: str) -> float:
+    return difflib.SequenceMatcher(
+        None, pred.strip().lower(), true.strip().lower()
+    ).ratio()
+
+
+# Define metrics per task
+metric_task_map: Dict[
+    str, Callable[[Union[str, List[str]], Union[str, List[str]]], float]
+] = defaultdict(
+    lambda: token_overlap,  # use token overlap as default
+    {
+        "sequence gene alias": f1_score_set,
+        "Disease gene location": fuzzy_location_score,
+        "SNP gene function": embedding_similarity,
+    },
+)
+
+# Metrics with a batched form, which takes lists of predictions and golds. Rows
+# scored by them are scored together once every row has been answered.
+BATCHED_METRICS: Dict[Callable, Callable[[List, List], List[float]]] = {
+    embedding_similarity: embedding_similarities,
+}
+
+
+def preprocess_answer(answer: str) -> str:
+    if isinstance(answer, list):
+        answer = ", ".join(answer)
+    elif not isinstance(answer, str):
+        answer = str(answer)
+    answer = answer.strip()
+    if "Answer:" in answer:
+        answer = answer.split("Answer:")[-1].strip()
+    return answer
+
+
+def get_answer(answer: str, task: str) -> List[str]:
+    answer = preprocess_answer(answer)
+
+    if task == "sequence gene alias":
+        try:
+            answer_list = ast.literal_eval(answer)
+            return answer_list if isinstance(answer_list, list) else [answer]
+        except Exception:
+            return [answer]
+
+    elif task == "Disease gene location":
+        matches = re.findall(r"\d{1,2}[pq]\d+(?:\.\d+)?", answer)
+        return matches or [answer]
+
+    elif task == "SNP gene function":
+        return [answer]
+
+
+# 5.2 Implement the answer mapping function
+def get_score(predictions: List[str], gold_answers: List[str], task: str) -> float:
+    """
+    Compute average score for a given task based on model predictions and ground truths.
+    """
+    assert len(predictions) == len(
+        gold_answers
+    ), "Mismatched number of predictions and ground truths."
+
+    correct = []
+
+    for pred, gold in zip(predictions, gold_answers):
+        pred_processed = get_answer(pred, task)
+        gold_processed = get_answer(gold, task)
+
+        # Get the appropriate metric function for this task
+        metric_fn = metric_task_map[task]
+        score = metric_fn(pred_processed, gold_processed)
+        correct.append(score)
+
+    return sum(correct) / len(correct) if correct else 0.0
+
+
+# 6.1 Set up data structures for results
+
+
+@dataclass
+class Result:
+    id: int
+    task: str
+    question: str
+    answer: str
+    prediction: str
+    score: Optional[float]
+    success: bool
+    prompt_tokens: Optional[int] = 0  # None for a stream cut before its usage
+    completion_tokens: int = 0
+    cached_tokens: Optional[int] = 0
+    latency_s: float = 0.0
+    ttft_s: Optional[float] = None
+    time_to_answer_s: Optional[float] = None
+    # Seconds per traced stage (empty unless tracing is enabled)
+    spans: Dict[str, float] = field(default_factory=dict)
+
+
+def save_results(results: List[Result], results_csv_filename: str) -> None:
+    df = pd.DataFrame(results)
+    # df = pd.DataFrame([asdict(r) for r in results])
+    df.to_csv(results_csv_filename, index=False)
+
+
+# 6.2 Loop over the dataset with a progress bar
+
+# * Do not forget to add the results to our Result list,
+#  both successful and failed predictions
+# * API calls will not always work,
+# so make sure we capture the exceptions from failed calls
+#    and add them to the Result list with a `status=False`
+
+
+def evaluate_dataset(
+    df: pd.DataFrame,
+    model_fn: Callable[[str], str],
+    sink: Optional[ResultSink] = None,
+    prefetch: bool = True,
+) -> Tuple[List[Result], Dict[str, float], float]:
+    """
+    Answer and score every row. If `sink` is given, each Result is streamed
+    to it as soon as it is scored and rows it already holds are reused
+    instead of being asked again. A row repeating an earlier question (see
+    `canonical.question_key`) reuses that answer without a new request.
+    `prefetch` queues the BLAST searches up front (off for cache replays).
+    """
+    results: List[Result] = []
+    answered: Dict[Tuple[str, str], str] = {}
+    # (position in results, metric, prediction, gold) of rows left to score
+    pending: List[Tuple[int, Callable, List[str], List[str]]] = []
+
+    done: Dict[int, Result] = {}
+    if sink is not None:
+        finished = sink.completed_ids()
+        done = {
+            row_id: Result(**record)
+            for row_id, record in sink.resumed_records().items()
+            if row_id in finished
+        }
+
+    # Queue every BLAST search up front so they run while other rows are answered
+    todo = df[~df.index.isin(list(done))]
+    sequence_questions = todo.loc[todo["task"] == "sequence gene alias", "question"]
+    if prefetch:
+        prefetch_blast([extract_dna_sequence(q) or q for q in sequence_questions])
+    snp_golds = todo.loc[todo["task"] == "SNP gene function", "answer"]
+    try:
+        with span("metric"):
+            cache_gold_embeddings(
+                [get_answer(a, "SNP gene function") for a in snp_golds]
+            )
+    except Exception as e:
+        # Rows are still scored one by one (and fail there if scoring cannot run)
+        print(f"Could not embed the gold answers up front: {e}")
+
+    for idx, row in tqdm(df.iterrows(), total=len(df)):
+        task = row["task"]
+        question = row["question"]
+        true_answer = row["answer"]
+
+        key = question_key(task, question)
+        if idx in done:
+            results.append(done[idx])
+            answered.setdefault(key, done[idx].prediction)
+            continue
+
+        take_usage()  # drop anything a failed call left behind
+        take_timing()
+        take_spans()
+        start = time.perf_counter()
+        try:
+            # Call the model, once per distinct question
+            if key in answered:
+                raw_pred = answered[key]
+            else:
+                raw_pred = model_fn(question, task)
+                answered[key] = raw_pred
+            latency = time.perf_counter() - start
+
+            # Post-process
+            with span("metric"):
+                pred = get_answer(raw_pred, task)
+                true = get_answer(true_answer, task)
+            # Score it
+            metric_fn: Callable[[str, str], float] = metric_task_map[task]
+            if metric_fn in BATCHED_METRICS:
+                pending.append((len(results), metric_fn, pred, true))
+                score = None
+            else:
+                with span("metric"):
+                    score = metric_fn(pred, true)
+            success = True
+        except CacheMissError:
+            raise
+        except Exception as e:
+            raw_pred = f"[ERROR] {e}"
+            score = 0.0
+            success = False
+            latency = time.perf_counter() - start
+
+        result = Result(
+            id=idx,
+            task=task,
+            question=question,
+            answer=true_answer,
+            prediction=raw_pred,
+            score=score,
+            success=success,
+            latency_s=latency,
+            **asdict(take_usage()),
+            **asdict(take_timing()),
+            spans=take_spans(),
+        )
+        results.append(result)
+        if sink is not None and score is not None:
+            sink.write(result)
+
+    score_pending(results, pending, sink)
+    task_scores, overall_score = aggregate_scores(results)
+    return results, task_scores, overall_score
+
+
+def score_pending(
+    results: List[Result],
+    pending: List[Tuple[int, Callable, List[str], List[str]]],
+    sink: Optional[ResultSink] = None,
+) -> None:
+    """
+    Score the rows `evaluate_dataset` left to a batched metric, one batch per
+    metric, and write them to `sink`. A batch that fails turns its rows into
+    errors, as a failing metric does for a single row.
+    """
+    by_metric: Dict[Callable, List[int]] = defaultdict(list)
+    for i, (_, metric_fn, _, _) in enumerate(pending):
+        by_metric[metric_fn].append(i)
+
+    for metric_fn, batch in by_metric.items():
+        rows = [results[pending[i][0]] for i in batch]
+        try:
+            scores = BATCHED_METRICS[metric_fn](
+                [pending[i][2] for i in batch], [pending[i][3] for i in batch]
+            )
+        except Exception as e:
+            for result in rows:
+                result.prediction = f"[ERROR] {e}"
+                result.score = 0.0
+                result.success = False
+        else:
+            for result, score in zip(rows, scores):
+                result.score = score
+        if sink is not None:
+            for result in rows:
+                sink.write(result)
+
+
+def aggregate_scores(results: List[Result]) -> Tuple[Dict[str, float], float]:
+    """
+    Average score per task over the successful rows (tasks in order of first
+    appearance) and the overall score as the mean of the task averages.
+    """
+    task_scores: Dict[str, float] = {}
+    task_counts: Dict[str, int] = {}
+    for result in results:
+        if result.success:
+            task_scores[result.task] = task_scores.get(result.task, 0.0) + result.score
+            task_counts[result.task] = task_counts.get(result.task, 0) + 1
+
+    # Compute average score per task
+    for task in task_scores:
+        task_scores[task] /= task_counts[task]
+
+    # Compute overall average score
+    overall_score = sum(task_scores.values()) / len(task_scores) if task_scores else 0.0
+    return task_scores, overall_score
+
+
+# 6.3 Save the results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    global args, client, response_cache, generation_profiles, ncbi_lookup
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        enable_tracing()
+
+    import matplotlib.pyplot as plt
+
+    load_dotenv()
+    os.environ["no_proxy"] = "*"
+
+    response_cache = (
+        ResponseCache(
+            args.cache,
+            max_entries=args.cache_max_entries,
+            max_age=args.cache_max_age,
+            replay_only=args.replay_only,
+        )
+        if args.cache
+        else None
+    )
+    # 3.1 Load the questions as a frame indexed by global row id
+    df = dataset.load_dataframe(DATA_PATH)
+
+    # 3.4 Per-task generation profiles (max_tokens, stop, temperature) sized from
+    #     the gold answer lengths of the whole dataset, so every shard agrees
+    generation_profiles = (
+        GenerationProfiles(MODEL_CONFIG)
+        if args.fixed_generation
+        else derive_profiles(df, MODEL_CONFIG)
+    )
+
+    # 4.1 Setting up the large language model Ollama model client
+    client = get_openai_client()
+
+    # Logged in the background; spooled to disk if the server is unreachable
+    with TelemetrySink(
+        MLFLOW_EXPERIMENT,
+        run_name="gene_hop_run",
+        tracking_uri=os.getenv("MLFLOW_TRACKING_URI", "http://198.215.61.34:8153"),
+    ) as telemetry:
+        # Log basic config
+        telemetry.log_param("deployment_name", AZURE_OPENAI_DEPLOYMENT_NAME)
+        telemetry.log_param("model", "Azure GPT-4.1")
+        telemetry.log_param("num_questions", len(df))
+        telemetry.log_param("shard", args.shard)
+        telemetry.log_param("stream", args.stream)
+        telemetry.log_param(
+            "prompt_prefix_sha256",
+            PromptPrefix(system_message, few_shot_examples).sha256,
+        )
+        telemetry.log_params(generation_profiles.params())
+
+        # Run evaluation
+        subset_df = dataset.select_dataframe(
+            df, args.tasks, args.limit_per_task, args.shard
+        )
+        # Share of rows that repeat an earlier question and are answered once
+        telemetry.log_metrics(dedup_metrics(subset_df))
+        # Resolve every SNP, gene and disease in batched NCBI calls up front;
+        # a replay takes the NCBI data of every row from the cache instead
+        prefetch = not args.replay_only
+        ncbi_lookup = NCBILookup()
+        if prefetch:
+            try:
+                ncbi_lookup = prefetch_ncbi_data(subset_df)
+            except Exception as e:
+                # Rows then look their NCBI data up live, and fail one by one
+                print(f"NCBI prefetch failed, falling back to per-row lookups: {e}")
+        with ResultSink(args.results_jsonl, resume=args.resume) as sink:
+            if args.batch:
+                telemetry.log_param("mode", "batch")
+                batch_client = (
+                    PlaybackBatchClient(args.batch_playback)
+                    if args.batch_playback
+                    else client
+                )
+                batch_profiles = generation_profiles
+                if args.batch_deployment:
+                    batch_profiles = GenerationProfiles(
+                        {**generation_profiles.base, "model": args.batch_deployment},
+                        generation_profiles.profiles,
+                    )
+                runner = BatchRunner(
+                    batch_client, min_poll=1.0 if args.batch_playback else 10.0
+                )
+                todo = subset_df[~subset_df.index.isin(list(sink.completed_ids()))]
+                results, task_scores, overall = evaluate_dataset(
+                    subset_df,
+                    batch_model_fn(todo, runner, batch_profiles, prefetch),
+                    sink=sink,
+                    prefetch=prefetch,
+                )
+            else:
+                results, task_scores, overall = evaluate_dataset(
+                    subset_df,
+                    partial(model_fn, stream=args.stream),
+                    sink=sink,
+                    prefetch=prefetch,
+                )
+        results_csv = dataset.shard_path("gene_hop_openai_results.csv", args.shard)
+        save_results(results, results_csv)
+        # Per-row score and latency, stepped by global row id
+        for result in results:
+            telemetry.log_metrics(
+                {"row_score": result.score or 0.0, "row_latency_s": result.latency_s},
+                step=result.id,
+            )
+
+        # Log overall score
+        telemetry.log_metric("overall_score", overall)
+        if response_cache is not None:
+            telemetry.log_metrics(response_cache.stats())
+        # Token usage and provider prompt-cache hit rate (cache replays count zero)
+        telemetry.log_metrics(usage_metrics(results))
+        # Completion tokens and p95 latency per task, to check the generation profiles
+        telemetry.log_metrics(usage_by_task(results))
+        # Per-task p50/p95/p99 of each traced stage, plus BLAST jobs and prefetches
+        # that ran outside any row
+        telemetry.log_param("trace", args.trace)
+        telemetry.log_metrics(span_metrics(results))
+        telemetry.log_metrics(background_metrics())
+
+        # Log NCBI E-utilities latency per endpoint
+        for endpoint, stats in get_eutils_client().metrics().items():
+            for name, value in stats.items():
+                telemetry.log_metric(f"ncbi_{endpoint.split('.')[0]}_{name}", value)
+
+        # Log fraction of successful predictions
+        results_df = pd.DataFrame(results)
+        fraction_successful = results_df["success"].mean()
+        telemetry.log_metric("fraction_successful", fraction_successful)
+
+        # Log score per task
+        for task, score in task_scores.items():
+            telemetry.log_metric(f"score_{task}", score)
+
+        # Log output CSV file
+        telemetry.log_artifact(results_csv)
+
+        print(f"Overall Score: {overall:.3f}")
+
+        # 7.1 Calculate the fraction of successful predictions
+        results_df = pd.DataFrame(results)
+        fraction_successful = results_df["score"].mean()
+        print(f"Fraction of successful predictions: {fraction_successful:.2%}")
+
+        # 7.2 Calculate the overall score and the score by task
+        print(f" Overall score: {overall:.3f}")
+        print(" Scores by task:")
+        for task, score in task_scores.items():
+            print(f"  - {task}: {score:.3f}")
+
+        # 7.3 Create a bar chart of the scores
+        # by task with a horizontal line for the overall score
+
+        # Sort tasks by name
+        sorted_tasks = sorted(task_scores.keys())
+        scores = [task_scores[task] for task in sorted_tasks]
+
+        plt.figure(figsize=(10, 5))
+        plt.bar(sorted_tasks, scores)
+        plt.axhline(
+            y=overall,
+            color="red",
+            linestyle="--",
+            label=f"Overall Score = {overall:.2f}",
+        )
+        plt.xticks(rotation=45, ha="right")
+        plt.ylabel("Score")
+        plt.title("Scores by Task")
+        plt.legend()
+        plt.tight_layout()
+        chart_filename = dataset.shard_path("scores_by_task_gene_hop.png", args.shard)
+        plt.savefig(chart_filename)  # Save BEFORE plt.show()
+        plt.show()
+        plt.close()
+
+        # Log it as an artifact
+        telemetry.log_artifact(chart_filename)
+
+
+if __name__ == "__main__":
+    main()
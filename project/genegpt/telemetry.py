@@ -0,0 +1,367 @@
+"""
+Buffered MLflow logging that stays off the evaluation's hot path.
+
+`TelemetrySink` takes params, tags, metrics (with steps) and artifacts into a
+buffer that a background thread sends with `log_batch`. mlflow is imported and
+the tracking server contacted on that thread only, so a slow server never
+stalls a run. If the server cannot be reached, records are spooled to local
+disk instead. `genegpt telemetry upload` sends the spool later.
+
+    with TelemetrySink("geneturing", run_name="gene_turing_run") as telemetry:
+        telemetry.log_params({"workers": 8})
+        telemetry.log_metrics({"row_score": 1.0}, step=row_id)
+        telemetry.log_artifact("results.csv")
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+DEFAULT_SPOOL_DIR = os.getenv("GENEGPT_TELEMETRY_SPOOL", "mlflow_spool")
+DEFAULT_EXPERIMENT = "Default"
+RUN_FILE = "run.json"
+RECORDS_FILE = "records.jsonl"
+ARTIFACTS_DIR = "artifacts"
+HEALTH_TIMEOUT_S = 3.0
+
+# log_batch limits of the MLflow REST API
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+
+
+class TelemetrySink:
+    """
+    One MLflow run, logged in the background.
+
+    Records are flushed every `flush_interval` seconds and on `close()`.
+    Once a flush fails, the rest of the run goes to `spool_dir`. The spool
+    remembers the remote run id, so an upload continues the same run. If the
+    server still has not answered `close_timeout` seconds after `close()`,
+    whatever is left is spooled and the run ends anyway.
+    """
+
+    def __init__(
+        self,
+        experiment: Optional[str],
+        run_name: Optional[str] = None,
+        tracking_uri: Optional[str] = None,
+        spool_dir: str = DEFAULT_SPOOL_DIR,
+        flush_interval: float = 5.0,
+        close_timeout: float = 60.0,
+    ) -> None:
+        self.experiment = experiment or DEFAULT_EXPERIMENT
+        self.run_name = run_name
+        self.tracking_uri = tracking_uri or os.getenv("MLFLOW_TRACKING_URI")
+        self.spool_dir = spool_dir
+        self.flush_interval = flush_interval
+        self.close_timeout = close_timeout
+        self.start_time = _now_ms()
+        self.end_time: Optional[int] = None
+        self.status = "RUNNING"
+        self.run_id: Optional[str] = None
+        self.spool_path: Optional[str] = None
+        self._records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = False
+        self._client: Any = None
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    # === Logging (cheap: only appends to the buffer) ===
+
+    def log_param(self, key: str, value: Any) -> None:
+        self._add({"type": "param", "key": key, "value": str(value)})
+
+    def log_params(self, params: Dict[str, Any]) -> None:
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def set_tag(self, key: str, value: Any) -> None:
+        self._add({"type": "tag", "key": key, "value": str(value)})
+
+    def log_metric(self, key: str, value: float, step: int = 0) -> None:
+        self._add(
+            {
+                "type": "metric",
+                "key": key,
+                "value": float(value),
+                "timestamp": _now_ms(),
+                "step": int(step),
+            }
+        )
+
+    def log_metrics(self, metrics: Dict[str, float], step: int = 0) -> None:
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def log_artifact(self, path: str) -> None:
+        self._add({"type": "artifact", "path": os.path.abspath(path)})
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records.append(record)
+
+    # === Lifecycle ===
+
+    def close(self, status: str = "FINISHED") -> None:
+        """Flush everything, end the run and wait for the background thread."""
+        with self._lock:
+            if self._closing:
+                return
+            self._closing = True
+            self.status = status
+            self.end_time = _now_ms()
+        self._wakeup.set()
+        self._thread.join(self.close_timeout)
+        if self._thread.is_alive():
+            with self._lock:
+                remaining, self._records = self._records, []
+            self._spool(remaining)
+            print(
+                f"Tracking server did not respond within {self.close_timeout:.0f}s; "
+                f"remaining telemetry spooled to {self.spool_path}"
+            )
+        if self.spool_path is not None:
+            print(
+                f"Telemetry spooled to {self.spool_path}; "
+                "upload it with `genegpt telemetry upload`"
+            )
+
+    def __enter__(self) -> "TelemetrySink":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.close("FAILED" if exc_type is not None else "FINISHED")
+
+    # === Background thread ===
+
+    def _run(self) -> None:
+        online = self._open_run()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._lock:
+                batch, self._records = self._records, []
+                closing = self._closing
+            if batch:
+                online = online and self._deliver(batch)
+                if not online:
+                    self._spool(batch)
+            if closing:
+                break
+        if online:
+            try:
+                self._client.set_terminated(self.run_id, self.status, self.end_time)
+                return
+            except Exception as e:
+                print(f"Could not end MLflow run {self.run_id}: {e}")
+        self._spool([])
+
+    def _open_run(self) -> bool:
+        if not reachable(self.tracking_uri):
+            print(f"MLflow tracking server {self.tracking_uri} is unreachable")
+            return False
+        try:
+            self._client = _client(self.tracking_uri)
+            self.run_id = _create_run(
+                self._client, self.experiment, self.run_name, self.start_time
+            )
+        except Exception as e:
+            print(f"Could not start an MLflow run: {e}")
+            return False
+        return True
+
+    def _deliver(self, records: List[Dict[str, Any]]) -> bool:
+        try:
+            send_records(self._client, self.run_id, records)
+        except Exception as e:
+            print(f"MLflow logging failed, spooling to disk: {e}")
+            return False
+        return True
+
+    def _spool(self, records: List[Dict[str, Any]]) -> None:
+        """Append `records` to this run's spool and update its run.json."""
+        with self._spool_lock:
+            if self.spool_path is None:
+                # Time first so uploads go in start order; the uuid keeps
+                # sinks started in the same second apart
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+                if self.run_name:
+                    name = f"{name}-{self.run_name}"
+                self.spool_path = os.path.join(self.spool_dir, name)
+                os.makedirs(os.path.join(self.spool_path, ARTIFACTS_DIR))
+            with open(os.path.join(self.spool_path, RECORDS_FILE), "a") as f:
+                for record in records:
+                    if record["type"] == "artifact":
+                        record = {**record, "path": self._stash(record["path"])}
+                    f.write(json.dumps(record) + "\n")
+            run = {
+                "experiment": self.experiment,
+                "run_name": self.run_name,
+                "tracking_uri": self.tracking_uri,
+                "run_id": self.run_id,
+                "start_time": self.start_time,
+                "end_time": self.end_time,
+                "status": self.status,
+            }
+            with open(os.path.join(self.spool_path, RUN_FILE), "w") as f:
+                json.dump(run, f, indent=2)
+
+    def _stash(self, path: str) -> str:
+        """Copy an artifact into the spool; returns its spool-relative path."""
+        # One directory per artifact, so files sharing a basename (or the same
+        # file logged twice) never overwrite each other
+        count = len(os.listdir(os.path.join(self.spool_path, ARTIFACTS_DIR)))
+        relative = os.path.join(ARTIFACTS_DIR, str(count), os.path.basename(path))
+        os.makedirs(os.path.dirname(os.path.join(self.spool_path, relative)))
+        shutil.copy2(path, os.path.join(self.spool_path, relative))
+        return relative
+
+
+# === MLflow plumbing ===
+
+
+def reachable(tracking_uri: Optional[str]) -> bool:
+    """Quick /health probe for HTTP tracking servers; local stores always pass."""
+    if not tracking_uri or not tracking_uri.startswith(("http://", "https://")):
+        return True
+    try:
+        response = requests.get(
+            f"{tracking_uri.rstrip('/')}/health", timeout=HEALTH_TIMEOUT_S
+        )
+    except requests.RequestException:
+        return False
+    return response.ok
+
+
+def _client(tracking_uri: Optional[str]) -> Any:
+    # mlflow takes seconds to import, so only the telemetry thread pays for it
+    from mlflow.tracking import MlflowClient
+
+    return MlflowClient(tracking_uri)
+
+
+def _create_run(
+    client: Any, experiment: str, run_name: Optional[str], start_time: int
+) -> str:
+    found = client.get_experiment_by_name(experiment)
+    experiment_id = (
+        found.experiment_id if found else client.create_experiment(experiment)
+    )
+    run = client.create_run(experiment_id, start_time=start_time, run_name=run_name)
+    return run.info.run_id
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def send_records(
+    client: Any, run_id: str, records: List[Dict[str, Any]], base_dir: str = ""
+) -> None:
+    """
+    Log buffered or spooled records to `run_id` with as few `log_batch`
+    calls as the API limits allow. Artifact paths are relative to `base_dir`.
+    """
+    from mlflow.entities import Metric, Param, RunTag
+
+    params: Dict[str, Any] = {}
+    tags: Dict[str, Any] = {}
+    metrics = []
+    for record in records:
+        kind = record["type"]
+        if kind == "param":
+            # The last value wins, as a second log_param would not be allowed
+            params[record["key"]] = Param(record["key"], record["value"])
+        elif kind == "tag":
+            tags[record["key"]] = RunTag(record["key"], record["value"])
+        elif kind == "metric":
+            metrics.append(
+                Metric(
+                    record["key"], record["value"], record["timestamp"], record["step"]
+                )
+            )
+    for chunk in _chunks(list(params.values()), MAX_PARAMS_PER_BATCH):
+        client.log_batch(run_id, params=chunk)
+    for chunk in _chunks(list(tags.values()), MAX_TAGS_PER_BATCH):
+        client.log_batch(run_id, tags=chunk)
+    for chunk in _chunks(metrics, MAX_METRICS_PER_BATCH):
+        client.log_batch(run_id, metrics=chunk)
+    for record in records:
+        if record["type"] == "artifact":
+            client.log_artifact(run_id, os.path.join(base_dir, record["path"]))
+
+
+# === Spool upload ===
+
+
+def upload_spool(spool_dir: str, tracking_uri: Optional[str] = None) -> int:
+    """
+    Send every spooled run to the tracking server and delete it once it is
+    logged. `tracking_uri` overrides the one each run was started with.
+    Returns the number of runs uploaded.
+    """
+    if not os.path.isdir(spool_dir):
+        return 0
+    uploaded = 0
+    for name in sorted(os.listdir(spool_dir)):
+        path = os.path.join(spool_dir, name)
+        run_file = os.path.join(path, RUN_FILE)
+        if not os.path.exists(run_file):
+            continue
+        with open(run_file) as f:
+            run = json.load(f)
+        records = []
+        records_file = os.path.join(path, RECORDS_FILE)
+        if os.path.exists(records_file):
+            with open(records_file) as f:
+                records = [json.loads(line) for line in f if line.strip()]
+
+        client = _client(tracking_uri or run["tracking_uri"])
+        if run["run_id"] is None:
+            run["run_id"] = _create_run(
+                client, run["experiment"], run["run_name"], run["start_time"]
+            )
+            # Remember the run so a failed upload resumes it instead of
+            # starting another
+            with open(run_file, "w") as f:
+                json.dump(run, f, indent=2)
+        send_records(client, run["run_id"], records, base_dir=path)
+        status = run["status"] if run["status"] != "RUNNING" else "FAILED"
+        client.set_terminated(run["run_id"], status, run["end_time"])
+        shutil.rmtree(path)
+        uploaded += 1
+        print(f"Uploaded {name} as run {run['run_id']}")
+    return uploaded
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Manage MLflow telemetry spooled while the server was down."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("upload", help="Upload spooled runs")
+    p.add_argument("--spool-dir", default=DEFAULT_SPOOL_DIR)
+    p.add_argument(
+        "--tracking-uri",
+        default=None,
+        help="Upload here instead of each run's own tracking URI",
+    )
+    args = parser.parse_args(argv)
+    uploaded = upload_spool(args.spool_dir, args.tracking_uri)
+    print(f"Uploaded {uploaded} spooled run(s) from {args.spool_dir}")
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
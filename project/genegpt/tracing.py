@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+import pandas as pd
+
+# Off unless a script calls enable() or GENEGPT_TRACE is set
+_enabled = os.getenv("GENEGPT_TRACE", "").lower() not in ("", "0", "false")
+
+# Spans land on the current row's thread-local totals. Threads that never
+# collect rows (the BLAST worker, prefetch pools) feed a process-wide list.
+_local = threading.local()
+_background: Dict[str, List[float]] = defaultdict(list)
+_background_lock = threading.Lock()
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str):
+    """Time the enclosed block as `name`; a shared no-op when tracing is off."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def record(name: str, seconds: float) -> None:
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        with _background_lock:
+            _background[name].append(seconds)
+    else:
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+def take_spans() -> Dict[str, float]:
+    """
+    Seconds per span name recorded on this thread since the last call, and
+    start collecting for the next row. Repeated spans (retries, several
+    esummary calls) are summed.
+    """
+    spans = getattr(_local, "spans", None) or {}
+    _local.spans = {}
+    return spans
+
+
+def span_metrics(results: Iterable[Any]) -> Dict[str, float]:
+    """p50/p95/p99 seconds per task and span, from rows carrying `spans`."""
+    rows = [
+        {"task": r.task, "span": name, "seconds": seconds}
+        for r in results
+        for name, seconds in (r.spans or {}).items()
+    ]
+    metrics: Dict[str, float] = {}
+    if not rows:
+        return metrics
+    frame = pd.DataFrame(rows)
+    for (task, name), group in frame.groupby(["task", "span"]):
+        for q in PERCENTILES:
+            value = float(group["seconds"].quantile(q))
+            metrics[f"span_{name}_p{int(q * 100)}_s_{task}"] = value
+    return metrics
+
+
+def background_metrics() -> Dict[str, float]:
+    """Count and p50/p95/p99 seconds of spans recorded outside any row."""
+    with _background_lock:
+        recorded = {name: list(values) for name, values in _background.items()}
+    metrics: Dict[str, float] = {}
+    for name, values in recorded.items():
+        series = pd.Series(values)
+        metrics[f"span_{name}_count"] = len(values)
+        for q in PERCENTILES:
+            metrics[f"span_{name}_p{int(q * 100)}_s"] = float(series.quantile(q))
+    return metrics
@@ -0,0 +1,87 @@
+import json
+
+import pandas as pd
+import pytest
+
+from genegpt.batch_runner import BatchRunner, PlaybackBatchClient, run_batch
+from genegpt.response_cache import ResponseCache
+
+CONFIG = {"model": "m", "temperature": 0}
+
+
+def completion(custom_id, content):
+    body = {
+        "choices": [{"message": {"content": content}}],
+        "usage": {
+            "prompt_tokens": 50,
+            "completion_tokens": 4,
+            "prompt_tokens_details": {"cached_tokens": 32},
+        },
+    }
+    return {"custom_id": custom_id, "response": {"status_code": 200, "body": body}}
+
+
+def failure(custom_id):
+    body = {"error": {"code": "content_filter", "message": "filtered"}}
+    return {"custom_id": custom_id, "response": {"status_code": 400, "body": body}}
+
+
+@pytest.fixture
+def playback(tmp_path):
+    # Row 2 never made it into the output file
+    lines = [completion("0", " Answer: TP53 "), failure("1"), completion("3", "x")]
+    path = tmp_path / "batch_output.jsonl"
+    path.write_text("\n".join(json.dumps(line) for line in lines))
+    client = PlaybackBatchClient(str(path))
+    submitted = []
+    create_file = client.files.create
+
+    def record(file, purpose):
+        created = create_file(file=file, purpose=purpose)
+        submitted.extend(
+            json.loads(line)["custom_id"]
+            for line in client.files.content(created.id).text.splitlines()
+        )
+        return created
+
+    client.files.create = record
+    return client, submitted
+
+
+def frame(n):
+    questions = [f"Question {i}?" for i in range(n)]
+    return pd.DataFrame({"task": ["t"] * n, "question": questions})
+
+
+def make_messages(row):
+    if row["question"] == "Question 4?":
+        raise RuntimeError("NCBI lookup failed")
+    return [{"role": "user", "content": row["question"]}]
+
+
+def key(question):
+    return ResponseCache.make_key(make_messages({"question": question}), CONFIG)
+
+
+def test_run_batch_through_playback(tmp_path, playback):
+    client, submitted = playback
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.put(key("Question 3?"), "cached")
+    runner = BatchRunner(client, work_dir=str(tmp_path), min_poll=0.0)
+
+    outputs = run_batch(frame(5), make_messages, CONFIG, runner, cache=cache)
+
+    # Cached and unbuildable rows are not submitted
+    assert submitted == ["0", "1", "2"]
+    content, usage = outputs[0]
+    assert content == "Answer: TP53"
+    assert usage.prompt_tokens == 50
+    assert usage.completion_tokens == 4
+    assert usage.cached_tokens == 32
+    assert outputs[1][0].startswith("[ERROR] ") and "filtered" in outputs[1][0]
+    assert outputs[2][0] == "[ERROR] missing from batch output"
+    assert outputs[3][0] == "cached"
+    assert outputs[4][0] == "[ERROR] NCBI lookup failed"
+    # Only the successful fresh answer is cached for later runs
+    assert cache.get(key("Question 0?")) == "Answer: TP53"
+    assert cache.get(key("Question 1?")) is None
@@ -0,0 +1,73 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from genegpt import ncbi_info
+from genegpt.blast_jobs import BlastError, BlastJobManager
+
+
+class StubSession:
+    """Blast.cgi stand-in: every query gets an RID, polls return its report."""
+
+    def __init__(self, fail_on=None, block=None):
+        self.fail_on = fail_on
+        self.block = block
+        self.puts = []
+
+    def post(self, url, data, timeout):
+        if self.block is not None:
+            self.block.wait()
+        self.puts.append(data["QUERY"])
+        if data["QUERY"] == self.fail_on:
+            raise ValueError("unexpected reply")
+        return SimpleNamespace(text=f"RID = R{len(self.puts)}\nRTOE = 0")
+
+    def get(self, url, params, timeout):
+        return SimpleNamespace(text=f"Status=READY\nreport for {params['RID']}")
+
+
+def manager(session, **kwargs):
+    return BlastJobManager(
+        url="http://blast.test",
+        request_interval=0.001,
+        min_delay=0.0,
+        session=session,
+        **kwargs,
+    )
+
+
+def test_unexpected_error_fails_only_its_query():
+    blast = manager(StubSession(fail_on="BAD"))
+
+    bad, good = blast.submit_many(["BAD", "GOOD"])
+
+    with pytest.raises(BlastError, match="unexpected reply"):
+        bad.result(timeout=5)
+    assert good.result(timeout=5) == "Status=READY\nreport for R2"
+
+
+def test_finished_futures_are_bounded():
+    session = StubSession()
+    blast = manager(session, max_finished=2)
+
+    reports = blast.blast_many(["A", "B", "C"])
+    assert len(reports) == 3
+    blast.blast_many(["C"])  # still held: no new request
+
+    assert session.puts == ["A", "B", "C"]
+    assert blast._futures == {}
+    assert [key[0] for key in blast._finished] == ["B", "C"]
+
+
+def test_blast_sequence_stops_waiting_after_the_timeout(monkeypatch):
+    block = threading.Event()
+    blast = manager(StubSession(block=block), timeout=0.05)
+    monkeypatch.setattr(ncbi_info, "get_blast_manager", lambda: blast)
+
+    try:
+        assert ncbi_info.blast_sequence("ACGT") == (
+            "Timed out waiting for BLAST results."
+        )
+    finally:
+        block.set()
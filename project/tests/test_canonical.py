@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from genegpt.canonical import (
+    dedup_metrics,
+    duplicate_of,
+    entity_keys,
+    normalize_question,
+    question_key,
+)
+
+SEQUENCE = "GGACAGCTGAGATCACATCAAGGATTCCAGAGTTTGACA"
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["task", "question"])
+
+
+def test_decompose_suffix_is_stripped():
+    question = (
+        "What are the aliases of the gene that contains this sequence: ACGT. "
+        "Let's decompose the question to sub-questions and solve them step by step."
+    )
+
+    assert normalize_question(question) == (
+        "What are the aliases of the gene that contains this sequence: ACGT."
+    )
+    assert normalize_question("Is AQP4 coding? lets DECOMPOSE the question.") == (
+        "Is AQP4 coding?"
+    )
+
+
+def test_whitespace_is_folded():
+    assert (
+        normalize_question("  What is the official\tgene symbol of\n LMP10? ")
+        == "What is the official gene symbol of LMP10?"
+    )
+
+
+def test_same_question_in_another_task_is_kept():
+    question = "What is the official gene symbol of LMP10?"
+    df = frame(
+        [
+            ("Gene alias", question),
+            ("Gene alias", f"  {question}"),
+            ("Gene name conversion", question),
+        ]
+    )
+
+    assert question_key("Gene alias", question) != question_key(
+        "Gene name conversion", question
+    )
+    assert duplicate_of(df) == {1: 0}
+    assert dedup_metrics(df)["unique_questions"] == 2
+
+
+@pytest.mark.parametrize(
+    "question, keys",
+    [
+        ("Which gene is SNP rs1217074595 associated with?", ["snp:rs1217074595"]),
+        (
+            "What are genes related to Meesmann corneal dystrophy?",
+            ["disease:meesmann corneal dystrophy"],
+        ),
+        (
+            f"Which organism does the DNA sequence come from:{SEQUENCE}",
+            [f"dna:{SEQUENCE}"],
+        ),
+        ("What is the official gene symbol of lmp10?", ["gene:LMP10"]),
+        ("Which chromosome is FAM66D gene located on human genome?", ["gene:FAM66D"]),
+        ("Convert ENSG00000215251 to official gene symbol.", ["gene:ENSG00000215251"]),
+        (
+            "List chromosome locations of the genes related to Hemolytic anemia. "
+            "Let's decompose the question to sub-questions.",
+            ["disease:hemolytic anemia"],
+        ),
+        ("Is AQP4 a protein-coding gene?", []),
+    ],
+)
+def test_entity_keys(question, keys):
+    assert entity_keys(question) == keys
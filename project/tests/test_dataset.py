@@ -0,0 +1,112 @@
+import argparse
+import json
+
+import pytest
+
+from genegpt import dataset
+from genegpt.dataset import Shard
+
+DATA = {
+    "Gene alias": {
+        "What is the official gene symbol of LMP10?": "PSMB10",
+        "What is the official gene symbol of SNAT6?": "SLC38A6",
+        "What is the official gene symbol of IMD20?": "FCGR3A",
+        "What is the official gene symbol of C7orf25?": "C7orf25",
+    },
+    "Gene disease association": {
+        "What are genes related to Hemolytic anemia?": ["PKLR", "G6PD"],
+        "What are genes related to Meesmann corneal dystrophy?": ["KRT12", "KRT3"],
+    },
+    "Gene location": {
+        "Which chromosome is FAM66D gene located on human genome?": "chr8",
+        "Which chromosome is TTTY7 gene located on human genome?": "chrY",
+        "Which chromosome is SLC38A6 gene located on human genome?": "chr14",
+    },
+}
+ROWS = list(dataset.flatten(DATA))
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+@pytest.fixture
+def frame(tmp_path):
+    path = tmp_path / "geneturing.json"
+    path.write_text(json.dumps(DATA))
+    return dataset.load_dataframe(str(path), cache=False)
+
+
+def test_shard_parse():
+    assert Shard.parse("1/4") == Shard(1, 4)
+    assert str(Shard.parse("0/1")) == "0/1"
+    for spec in ("4/4", "-1/4", "1", "a/b", "1/2/3"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            Shard.parse(spec)
+
+
+def test_flatten_numbers_rows_in_file_order():
+    assert ids(ROWS) == list(range(9))
+    assert ROWS[4] == {
+        "id": 4,
+        "task": "Gene disease association",
+        "question": "What are genes related to Hemolytic anemia?",
+        "answer": ["PKLR", "G6PD"],
+    }
+
+
+def test_select_by_task_and_limit():
+    assert ids(dataset.select(ROWS, tasks=["Gene location"])) == [6, 7, 8]
+    assert ids(dataset.select(ROWS, limit_per_task=2)) == [0, 1, 4, 5, 6, 7]
+
+
+def test_ids_are_stable_across_task_filters():
+    by_id = {row["id"]: row for row in ROWS}
+    for tasks in (["Gene location"], ["Gene alias", "Gene location"]):
+        for row in dataset.select(ROWS, tasks=tasks):
+            assert row == by_id[row["id"]]
+
+
+@pytest.mark.parametrize("limit_per_task", [None, 1, 3])
+@pytest.mark.parametrize("count", [1, 2, 4])
+def test_shards_partition_the_selection(count, limit_per_task):
+    unsharded = ids(dataset.select(ROWS, limit_per_task=limit_per_task))
+    shards = [
+        ids(dataset.select(ROWS, limit_per_task=limit_per_task, shard=Shard(i, count)))
+        for i in range(count)
+    ]
+
+    seen = [row_id for shard in shards for row_id in shard]
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == unsharded
+
+
+def test_limit_per_task_applies_before_sharding():
+    # The first two rows of each task are 0, 1, 4, 5, 6, 7; shard 0/2 keeps the
+    # even ones rather than the first two even rows of each task
+    rows = dataset.select(ROWS, limit_per_task=2, shard=Shard(0, 2))
+
+    assert ids(rows) == [0, 4, 6]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"tasks": ["Gene alias", "Gene location"]},
+        {"limit_per_task": 2},
+        {"limit_per_task": 2, "shard": Shard(1, 2)},
+        {"tasks": ["Gene disease association"], "shard": Shard(0, 3)},
+    ],
+)
+def test_select_dataframe_matches_select(frame, options):
+    selected = dataset.select_dataframe(frame, **options)
+
+    assert selected.reset_index().to_dict("records") == list(
+        dataset.select(ROWS, **options)
+    )
+
+
+def test_shard_path():
+    assert dataset.shard_path("out/x.csv", None) == "out/x.csv"
+    assert dataset.shard_path("out/x.csv", Shard(0, 4)) == "out/x.shard-0-of-4.csv"
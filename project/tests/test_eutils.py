@@ -0,0 +1,85 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from genegpt import eutils
+from genegpt.eutils import EUtilsClient
+from genegpt.fixture_server import FixtureServer, FixtureStore, request_key
+
+ESEARCH = "/eutils/esearch.fcgi"
+QUERY = "db=gene&retmode=json&term=TP53"
+RESULT = '{"esearchresult": {"idlist": ["7157"]}}'
+
+
+def exchange(status, body="{}", headers=None):
+    return {
+        "key": request_key("GET", ESEARCH, QUERY, b"", ""),
+        "status": status,
+        "content_type": "application/json",
+        "headers": headers or {},
+        "body": body,
+    }
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the client backs off for, instead of sleeping them."""
+    delays = []
+    clock = SimpleNamespace(sleep=delays.append, perf_counter=time.perf_counter)
+    monkeypatch.setattr(eutils, "time", clock)
+    return delays
+
+
+def serve(tmp_path, *exchanges):
+    store = FixtureStore(str(tmp_path / "exchanges.jsonl"))
+    for record in exchanges:
+        store.add(record)
+    return FixtureServer(store)
+
+
+def search(client):
+    return client.get_json("esearch.fcgi", {"db": "gene", "term": "TP53"})
+
+
+def test_retries_honour_retry_after(tmp_path, sleeps):
+    server = serve(
+        tmp_path,
+        exchange(429, headers={"Retry-After": "2"}),
+        exchange(503),
+        exchange(200, RESULT),
+    )
+    with server:
+        client = EUtilsClient(server.url("eutils"), api_key="k", backoff=0.0)
+        result = search(client)
+
+    assert result["esearchresult"]["idlist"] == ["7157"]
+    # Retry-After wins over the (here zero) exponential backoff
+    assert sleeps == [2.0, 0.0]
+    metrics = client.metrics()["esearch.fcgi"]
+    assert (metrics["count"], metrics["errors"]) == (3, 2)
+    assert server.served == 3
+
+
+def test_gives_up_after_max_retries(tmp_path, sleeps):
+    with serve(tmp_path, exchange(500)) as server:
+        client = EUtilsClient(server.url("eutils"), max_retries=2, backoff=1.0)
+        with pytest.raises(requests.HTTPError):
+            search(client)
+
+    assert server.served == 3
+    assert 1.0 <= sleeps[0] <= 2.0 and 2.0 <= sleeps[1] <= 3.0
+
+
+def test_token_bucket_paces_requests(tmp_path):
+    with serve(tmp_path, exchange(200, RESULT)) as server:
+        client = EUtilsClient(server.url("eutils"), rate=10.0)
+        start = time.perf_counter()
+        for _ in range(15):
+            search(client)
+        elapsed = time.perf_counter() - start
+
+    # A full bucket covers the first 10 requests; the other 5 wait 0.1s each
+    assert elapsed >= 0.45
+    assert client.metrics()["esearch.fcgi"]["count"] == 15
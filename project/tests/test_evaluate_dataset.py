@@ -0,0 +1,119 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from genegpt import starter_geneturing_openai as geneturing
+from genegpt.throttle import RateLimiter
+
+
+class StubClient:
+    """Answers "Answer: <gene>" for the gene named in each question."""
+
+    def __init__(self, answers, delays=None):
+        self.answers = answers
+        self.delays = delays or {}
+        self.questions = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **config):
+        question = messages[-1]["content"]
+        with self._lock:
+            self.questions.append(question)
+        time.sleep(self.delays.get(question, 0.0))
+        message = SimpleNamespace(content=f"Answer: {self.answers[question]}")
+        usage = SimpleNamespace(
+            prompt_tokens=100, completion_tokens=5, prompt_tokens_details=None
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(requests_per_minute=600)
+        self.acquired = []
+
+    def acquire(self, tokens=0):
+        self.acquired.append(tokens)
+        super().acquire(tokens)
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["task", "question", "answer"]).rename_axis("id")
+
+
+def stub_model_fn(client):
+    def model_fn(question, task):
+        return geneturing.query_model(
+            client, geneturing.system_message, geneturing.few_shot_examples, question
+        )
+
+    return model_fn
+
+
+def test_results_come_back_in_row_order():
+    df = frame(
+        [
+            ("Gene alias", "What is the official gene symbol of SLOW?", "BRCA1"),
+            ("Gene alias", "What is the official gene symbol of FAST?", "TP53"),
+            ("Gene alias", "What is the official gene symbol of MID?", "EGFR"),
+        ]
+    )
+    answers = {
+        df.question[0]: "BRCA1",
+        df.question[1]: "TP53",
+        df.question[2]: "KRAS",
+    }
+    # The first row finishes last, so completion order differs from row order
+    client = StubClient(answers, delays={df.question[0]: 0.2, df.question[2]: 0.1})
+
+    results, task_scores, overall = geneturing.evaluate_dataset(
+        df, stub_model_fn(client), max_workers=3
+    )
+
+    assert [r.id for r in results] == [0, 1, 2]
+    assert [r.prediction for r in results] == ["BRCA1", "TP53", "KRAS"]
+    assert [r.success for r in results] == [True, True, False]
+    assert [r.prompt_tokens for r in results] == [100, 100, 100]
+    assert task_scores == {"Gene alias": 2 / 3}
+    assert overall == 2 / 3
+
+
+def test_limiter_is_acquired_once_per_request():
+    df = frame(
+        [
+            ("Gene alias", "What is the official gene symbol of A?", "A1"),
+            ("Gene alias", "What is the official gene symbol of B?", "B1"),
+            # Repeats row 0: answered from it, without a request
+            ("Gene alias", "What is the official gene symbol of  A?", "A1"),
+        ]
+    )
+    client = StubClient({df.question[0]: "A1", df.question[1]: "B1"})
+    limiter = CountingLimiter()
+
+    results, _, _ = geneturing.evaluate_dataset(
+        df,
+        stub_model_fn(client),
+        max_workers=2,
+        limiter=limiter,
+        token_estimate=lambda question, task: 42,
+    )
+
+    assert len(client.questions) == 2
+    assert limiter.acquired == [42, 42]
+    assert [r.prediction for r in results] == ["A1", "B1", "A1"]
+    assert results[2].prompt_tokens == 0
+
+
+def test_model_errors_are_recorded_per_row():
+    df = frame([("Gene alias", "What is the official gene symbol of X?", "X1")])
+
+    def failing(question, task):
+        raise RuntimeError("boom")
+
+    results, _, overall = geneturing.evaluate_dataset(df, failing, limiter=None)
+
+    assert results[0].prediction == "[ERROR] boom"
+    assert overall == 0.0
@@ -0,0 +1,55 @@
+import requests
+
+from genegpt.fixture_server import FixtureServer, FixtureStore, request_key
+
+FORM = "application/x-www-form-urlencoded"
+
+
+def test_request_key_ignores_credentials_and_order():
+    key = request_key("GET", "/eutils/esearch.fcgi", "db=gene&term=TP53", b"", "")
+
+    assert key == request_key(
+        "GET", "/eutils/esearch.fcgi", "term=TP53&api_key=x&db=gene&email=a@b", b"", ""
+    )
+    assert key != request_key(
+        "GET", "/eutils/esearch.fcgi", "db=gene&term=EGFR", b"", ""
+    )
+    assert request_key("POST", "/blast", "", b"CMD=Get&RID=R1", FORM) == request_key(
+        "POST", "/blast", "", b"RID=R1&tool=x&CMD=Get", FORM
+    )
+
+
+def test_store_replays_in_order_then_repeats_the_last(tmp_path):
+    path = str(tmp_path / "exchanges.jsonl")
+    recorder = FixtureStore(path)
+    for body in ("Status=WAITING", "Status=READY"):
+        recorder.add({"key": "poll", "status": 200, "body": body})
+    recorder.add({"key": "other", "status": 200, "body": "other"})
+
+    store = FixtureStore(path)
+
+    assert [store.next("poll")["body"] for _ in range(3)] == [
+        "Status=WAITING",
+        "Status=READY",
+        "Status=READY",
+    ]
+    assert store.next("other")["body"] == "other"
+    assert store.next("missing") is None
+
+
+def test_server_replays_recorded_exchanges(tmp_path):
+    path = str(tmp_path / "exchanges.jsonl")
+    recorded = FixtureStore(path)
+    key = request_key("GET", "/eutils/esearch.fcgi", "db=gene&term=TP53", b"", "")
+    recorded.add(
+        {"key": key, "status": 200, "content_type": "application/json", "body": "{}"}
+    )
+
+    with FixtureServer(FixtureStore(path)) as server:
+        url = f"{server.url('eutils')}/esearch.fcgi"
+        hit = requests.get(url, params={"db": "gene", "term": "TP53", "api_key": "k"})
+        miss = requests.get(url, params={"db": "gene", "term": "EGFR"})
+
+    assert (hit.status_code, hit.json()) == (200, {})
+    assert miss.status_code == 404
+    assert (server.served, server.misses) == (2, 1)
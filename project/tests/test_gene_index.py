@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+
+from genegpt.gene_index import GeneIndex, build_index
+
+HEADER = (
+    "#tax_id\tGeneID\tSymbol\tLocusTag\tSynonyms\tdbXrefs\tchromosome\t"
+    "map_location\tdescription\n"
+)
+GENE_INFO = [
+    "9606\t7157\tTP53\t-\tBCC7|LFS1|P53\t-\t17\t17p13.1\ttumor protein p53\n",
+    "9606\t672\tBRCA1\t-\tBRCC1|RNF53\t-\t17\t17q21.31\tBRCA1 DNA repair associated\n",
+    "10090\t22059\tTrp53\t-\tp53|bbl\t-\t11\t11 B3\ttransformation related protein 53\n",
+]
+
+
+@pytest.fixture
+def gene_info(tmp_path):
+    path = tmp_path / "gene_info.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(HEADER + "".join(GENE_INFO))
+    return str(path)
+
+
+@pytest.fixture
+def index(gene_info, tmp_path):
+    db_path = str(tmp_path / "genes.sqlite")
+    assert build_index(gene_info, db_path) == 2  # human genes only
+    return GeneIndex(db_path)
+
+
+def test_build_index_keeps_every_taxon_without_a_filter(gene_info, tmp_path):
+    db_path = str(tmp_path / "all.sqlite")
+
+    assert build_index(gene_info, db_path, tax_id=None) == 3
+    assert GeneIndex(db_path).gene_ids(["Trp53"]) == ["22059"]
+
+
+def test_missing_index_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        GeneIndex(str(tmp_path / "missing.sqlite"))
+
+
+def test_symbol_lookup_ignores_case(index):
+    assert index.official_symbols("tp53") == ["TP53"]
+    assert index.official_symbols("rnf53") == ["BRCA1"]
+    assert index.official_symbols("Trp53") == []
+
+
+def test_gene_ids_fall_back_to_aliases(index):
+    assert index.gene_ids(["brca1"]) == ["672"]
+    assert index.gene_ids(["LFS1", "TP53", "NOPE"]) == ["7157"]
+
+
+def test_summaries_are_esummary_shaped(index):
+    assert index.summaries(["7157", "22059"]) == {
+        "7157": {
+            "name": "TP53",
+            "otheraliases": "BCC7, LFS1, P53",
+            "maplocation": "17p13.1",
+        }
+    }
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from genegpt import starter_genehop_openai as genehop
+from genegpt.gene_hop_no_ncbi import embedding_similarity
+from genegpt.result_sink import ResultSink, read_jsonl
+
+ROWS = [
+    ("SNP gene function", "What is the function of the gene rs1?", "kinase"),
+    ("Disease gene location", "Where is TP53?", ["17p13.1"]),
+    ("SNP gene function", "What is the function of the gene rs2?", "channel"),
+    ("SNP gene function", "What is the function of the gene rs3?", "receptor"),
+]
+PREDICTIONS = {"Where is TP53?": "Answer: 17p13.1"}
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["task", "question", "answer"]).rename_axis("id")
+
+
+def model_fn(question, task):
+    return PREDICTIONS.get(question, f"Answer: {question[-4:-1]} protein")
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    calls = []
+
+    def similarities(preds, trues):
+        calls.append((preds, trues))
+        return [0.5] * len(preds)
+
+    monkeypatch.setattr(
+        genehop, "BATCHED_METRICS", {embedding_similarity: similarities}
+    )
+    monkeypatch.setattr(genehop, "cache_gold_embeddings", lambda golds: None)
+    return calls
+
+
+def test_embedding_scored_rows_share_one_batch(batches, tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    with ResultSink(path) as sink:
+        results, task_scores, _ = genehop.evaluate_dataset(
+            frame(ROWS), model_fn, sink=sink, prefetch=False
+        )
+
+    assert batches == [
+        (
+            [["rs1 protein"], ["rs2 protein"], ["rs3 protein"]],
+            [["kinase"], ["channel"], ["receptor"]],
+        )
+    ]
+    assert [r.score for r in results] == pytest.approx([0.5, 1.0, 0.5, 0.5])
+    assert task_scores["SNP gene function"] == 0.5
+    assert sorted(r["id"] for r in read_jsonl(path)) == [0, 1, 2, 3]
+
+
+def test_failed_batch_marks_its_rows_as_errors(batches, monkeypatch):
+    def failing(preds, trues):
+        raise RuntimeError("no torch")
+
+    monkeypatch.setattr(genehop, "BATCHED_METRICS", {embedding_similarity: failing})
+
+    results, task_scores, _ = genehop.evaluate_dataset(
+        frame(ROWS), model_fn, prefetch=False
+    )
+
+    assert [r.success for r in results] == [False, True, False, False]
+    assert results[0].prediction == "[ERROR] no torch"
+    assert list(task_scores) == ["Disease gene location"]
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import LengthFinishReasonError, RateLimitError
+from pydantic import ValidationError
+
+from genegpt import llm_judge
+from genegpt.llm_judge import BatchStats, VerdictBatch, judge_batch
+
+ITEMS = [("Q1", "A1", "P1"), ("Q2", "A2", "P2")]
+
+
+def raising(error):
+    def call(_call, _limiter):
+        raise error
+
+    return call
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://judge.test/chat/completions")
+    response = httpx.Response(429, request=request)
+    return RateLimitError("Too many requests", response=response, body=None)
+
+
+def validation_error():
+    with pytest.raises(ValidationError) as info:
+        VerdictBatch.model_validate_json('{"verdicts": [{"index": 0}]}')
+    return info.value
+
+
+def test_rate_limits_are_raised_not_split(monkeypatch):
+    monkeypatch.setattr(llm_judge, "call_with_throttle", raising(rate_limit_error()))
+
+    with pytest.raises(RateLimitError):
+        judge_batch(ITEMS, None, BatchStats())
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        validation_error(),
+        LengthFinishReasonError(completion=SimpleNamespace(usage=None)),
+    ],
+    ids=["invalid JSON", "truncated"],
+)
+def test_unparseable_replies_are_split(monkeypatch, error):
+    monkeypatch.setattr(llm_judge, "call_with_throttle", raising(error))
+    stats = BatchStats()
+
+    assert judge_batch(ITEMS, None, stats) is None
+    assert stats.requests == 0
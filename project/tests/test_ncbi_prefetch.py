@@ -0,0 +1,58 @@
+import pytest
+
+from genegpt import ncbi_info, ncbi_prefetch
+
+SEARCH = {"TP53": ["7157", "22059"], "EGFR": ["1956"]}
+SUMMARIES = {
+    "7157": {"name": "TP53", "otheraliases": "P53, LFS1, TRP53"},
+    "22059": {"name": "Trp53", "otheraliases": "p53, bbl"},
+    "1956": {"name": "EGFR", "otheraliases": "ERBB, HER1, ERBB1"},
+}
+
+
+class StubEUtils:
+    def __init__(self):
+        self.calls = []
+
+    def get_json(self, endpoint, params):
+        self.calls.append((endpoint, params))
+        if endpoint == "esearch.fcgi":
+            return {"esearchresult": {"idlist": SEARCH.get(params["term"], [])}}
+        return self.summaries(params["id"])
+
+    def post_json(self, endpoint, params):
+        self.calls.append((endpoint, params))
+        return self.summaries(params["id"])
+
+    def summaries(self, ids):
+        result = {uid: SUMMARIES[uid] for uid in ids.split(",")}
+        return {"result": {"uids": list(result), **result}}
+
+
+@pytest.fixture
+def eutils(monkeypatch):
+    stub = StubEUtils()
+    for module in (ncbi_info, ncbi_prefetch):
+        monkeypatch.setattr(module, "get_client", lambda: stub)
+        monkeypatch.setattr(module, "get_gene_index", lambda: None)
+    return stub
+
+
+def test_prefetched_aliases_match_the_live_lookup(eutils):
+    symbols = ["EGFR", "TP53", "NOPE"]
+
+    prefetched = ncbi_prefetch.prefetch_gene_aliases(symbols)
+    live = {symbol: ncbi_info.lookup_gene_aliases(symbol) for symbol in symbols}
+
+    assert prefetched == live
+    assert prefetched["TP53"] == ["LFS1", "P53", "TP53", "TRP53", "Trp53", "bbl", "p53"]
+    assert prefetched["NOPE"] == []
+
+
+def test_prefetch_fetches_summaries_in_one_pass(eutils):
+    ncbi_prefetch.prefetch_gene_aliases(["EGFR", "TP53"])
+
+    summaries = [
+        params for endpoint, params in eutils.calls if endpoint != "esearch.fcgi"
+    ]
+    assert [params["id"] for params in summaries] == ["1956,22059,7157"]
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from genegpt.fixture_server import FixtureServer, FixtureStore, request_key
+from genegpt.openai_clients import get_async_client
+
+MESSAGES = [{"role": "user", "content": "What is the official gene symbol of X?"}]
+COMPLETION = {
+    "id": "c1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "Answer: TP53"},
+        }
+    ],
+}
+
+
+def test_async_client_survives_successive_event_loops(tmp_path, monkeypatch):
+    store = FixtureStore(str(tmp_path / "exchanges.jsonl"))
+    store.add(
+        {
+            "key": request_key(
+                "POST",
+                "/openai/deployments/gpt/chat/completions",
+                "api-version=2024-06-01",
+                json.dumps({"messages": MESSAGES, "model": "gpt"}).encode(),
+                "application/json",
+            ),
+            "status": 200,
+            "content_type": "application/json",
+            "body": json.dumps(COMPLETION),
+        }
+    )
+
+    async def ask():
+        client = get_async_client(api_version="2024-06-01", api_key="k")
+        assert get_async_client(api_version="2024-06-01", api_key="k") is client
+        response = await client.chat.completions.create(model="gpt", messages=MESSAGES)
+        return client, response.choices[0].message.content
+
+    with FixtureServer(store) as server:
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT_OVERRIDE", server.url("openai"))
+        first, first_answer = asyncio.run(ask())
+        second, second_answer = asyncio.run(ask())
+
+    assert first_answer == second_answer == "Answer: TP53"
+    assert first is not second
+    assert server.misses == 0
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from genegpt import starter_genehop_openai as genehop
+from genegpt import starter_geneturing_openai as geneturing
+from genegpt.response_cache import EVICT_EVERY, CacheMissError, ResponseCache
+
+
+@pytest.mark.parametrize(
+    "starter", [geneturing, genehop], ids=["geneturing", "genehop"]
+)
+def test_cache_limit_flags(starter):
+    args = starter.build_parser().parse_args(
+        ["--cache", "c.sqlite", "--cache-max-entries", "500", "--cache-max-age", "3600"]
+    )
+
+    assert (args.cache_max_entries, args.cache_max_age) == (500, 3600.0)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_entries=2)
+    for i in range(EVICT_EVERY - 1):
+        cache.put(f"k{i}", str(i))
+    cache.get("k0")
+    cache.put("new", "new")  # the write that triggers eviction
+
+    assert cache.get("k0") == "0"
+    assert cache.get("new") == "new"
+    assert cache.get("k1") is None
+
+
+def test_entries_past_max_age_are_misses(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    ResponseCache(path).put("k", "v")
+
+    assert ResponseCache(path, max_age=3600).get("k") == "v"
+    assert ResponseCache(path, max_age=-1).get("k") is None
+
+
+def test_genehop_replay_needs_no_ncbi_lookups(tmp_path, monkeypatch):
+    class StubClient:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        def create(self, messages, **config):
+            message = SimpleNamespace(content="Answer: chr17")
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=message)], usage=None
+            )
+
+    path = str(tmp_path / "c.sqlite")
+    question = "Which chromosome are TP53 and BRCA1 on?"
+    monkeypatch.setattr(genehop, "client", StubClient())
+    monkeypatch.setattr(genehop, "response_cache", ResponseCache(path))
+    monkeypatch.setattr(
+        genehop, "dispatch_ncbi_data", lambda task, q, lookup: {"TP53": "17p13.1"}
+    )
+    live = genehop.model_fn(question, "Gene location")
+
+    def no_lookups(*args, **kwargs):
+        raise AssertionError("replay looked NCBI up")
+
+    replay = ResponseCache(path, replay_only=True)
+    monkeypatch.setattr(genehop, "client", None)
+    monkeypatch.setattr(genehop, "response_cache", replay)
+    monkeypatch.setattr(genehop, "dispatch_ncbi_data", no_lookups)
+
+    assert genehop.model_fn(question, "Gene location") == live
+    assert replay.stats()["cache_hits"] == 1
+    with pytest.raises(CacheMissError):
+        genehop.model_fn("Which chromosome is EGFR on?", "Gene location")
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from genegpt import starter_geneturing_openai as geneturing
+
+# One or more rows for every branch of get_answer, with error rows and empty
+# predictions mixed in
+ROWS = [
+    ("Gene alias", "Answer: TP53", "The official symbol is TP53"),
+    ("Gene alias", "BRCA1", "[ERROR] Rate limit exceeded"),
+    ("Gene alias", "EGFR", ""),
+    ("Gene location", "chr17", "Answer: chr17"),
+    ("Gene location", "chr7", "Answer: it is on chr17"),
+    ("SNP location", "chr1", "answer: unknown"),
+    ("Gene disease association", "BRCA1, TP53", "Answer: TP53, BRCA1"),
+    ("Gene disease association", "BRCA1, TP53", "Answer: BRCA1, TP53"),
+    ("Gene disease association", "BRCA1", ""),
+    ("Disease gene location", "17q21.31, 13q13.1", "Answer: 17q21.31, 13q13.1"),
+    ("Protein-coding genes", "TRUE", "Answer: Yes"),
+    ("Protein-coding genes", "NA", "Answer: No"),
+    ("Protein-coding genes", "TRUE", "[ERROR] timeout"),
+    ("Protein-coding genes", "NA", ""),
+    ("Multi-species DNA aligment", "worm", "Answer: Caenorhabditis elegans"),
+    ("Multi-species DNA aligment", "mouse", "Answer: Rattus norvegicus"),
+    ("Multi-species DNA aligment", "yeast", "Answer: yeast"),
+    ("Gene name conversion", "ENSG00000141510", " Answer: ENSG00000141510 "),
+    ("Human genome DNA aligment", "chr8:7081648-7081782", "Answer: chr8:1-100"),
+]
+
+
+def reference_scores(df):
+    """Per-row scores the way the scripts computed them before vectorizing."""
+    return [
+        float(
+            geneturing.metric_task_map[task](
+                geneturing.get_answer(prediction, task),
+                geneturing.get_answer(answer, task),
+            )
+        )
+        for task, answer, prediction in df[["task", "answer", "prediction"]].itertuples(
+            index=False
+        )
+    ]
+
+
+def test_vectorized_scoring_matches_the_per_row_reference():
+    df = pd.DataFrame(ROWS, columns=["task", "answer", "prediction"])
+    expected = reference_scores(df)
+
+    scores, successes, task_scores, overall = geneturing.score_predictions(df)
+
+    assert scores.tolist() == pytest.approx(expected)
+    assert successes.tolist() == [score == 1.0 for score in expected]
+    per_task = pd.Series(expected).groupby(df["task"], sort=False).mean()
+    assert task_scores == pytest.approx(per_task.to_dict())
+    assert list(task_scores) == list(dict.fromkeys(df["task"]))
+    assert overall == pytest.approx(per_task.mean())
+
+
+@pytest.mark.parametrize(
+    "metric, pairs",
+    [
+        (
+            geneturing.gene_disease_association,
+            [
+                (["TP53", "BRCA1"], ["brca1", "TP53 "]),
+                (["TP53"], ["BRCA1", "TP53"]),
+                (["TP53", "TP53"], ["TP53"]),
+                ([], []),
+                (["TP53"], []),
+                ([], ["TP53"]),
+            ],
+        ),
+        (
+            geneturing.human_genome_dna_alignment,
+            [
+                ("chr8:1-100", "chr8:1-100"),
+                ("chr8:1-100", "CHR8:5-6"),
+                ("chr9:1-100", "chr8:1-100"),
+                ("", "chr8:1-100"),
+            ],
+        ),
+        (geneturing.exact_match, [("TP53", " tp53"), ("TP53", "BRCA1"), ("", "")]),
+    ],
+)
+def test_vectorized_metrics_match_their_row_functions(metric, pairs):
+    pred = pd.Series([p for p, _ in pairs])
+    true = pd.Series([t for _, t in pairs])
+
+    scores = geneturing.VECTORIZED_METRICS[metric](pred, true)
+
+    assert scores.tolist() == pytest.approx([float(metric(p, t)) for p, t in pairs])
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from genegpt import dataset, sharded
+from genegpt import starter_geneturing_openai as geneturing
+from genegpt.dataset import Shard
+from genegpt.result_sink import ResultSink
+
+DATA = {
+    "Gene alias": {
+        "What is the official gene symbol of LMP10?": "PSMB10",
+        "What is the official gene symbol of SNAT6?": "SLC38A6",
+        "What is the official gene symbol of IMD20?": "FCGR3A",
+    },
+    "Gene location": {
+        "Which chromosome is FAM66D gene located on human genome?": "chr8",
+        "Which chromosome is TTTY7 gene located on human genome?": "chrY",
+    },
+    "Protein-coding genes": {
+        "Is LOC124907753 a protein-coding gene?": "NA",
+        "Is AQP4 a protein-coding gene?": "TRUE",
+    },
+}
+# Right for some rows, wrong for others, so every task scores between 0 and 1
+PREDICTIONS = {
+    "What is the official gene symbol of LMP10?": "PSMB10",
+    "What is the official gene symbol of SNAT6?": "SLC38A1",
+    "What is the official gene symbol of IMD20?": "FCGR3A",
+    "Which chromosome is FAM66D gene located on human genome?": "chr8",
+    "Which chromosome is TTTY7 gene located on human genome?": "chrX",
+    "Is LOC124907753 a protein-coding gene?": "Yes",
+    "Is AQP4 a protein-coding gene?": "Yes",
+}
+SHARDS = 3
+
+
+def model_fn(question, task):
+    return PREDICTIONS[question]
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    path = tmp_path / "geneturing.json"
+    path.write_text(json.dumps(DATA))
+    monkeypatch.setattr(geneturing, "DATA_PATH", str(path))
+    return str(path)
+
+
+def run_shards(data_path, out_dir):
+    df = dataset.load_dataframe(data_path, cache=False)
+    for index in range(SHARDS):
+        shard = Shard(index, SHARDS)
+        path = sharded.results_path(str(out_dir), "geneturing", shard)
+        with ResultSink(path) as sink:
+            geneturing.evaluate_dataset(
+                dataset.select_dataframe(df, shard=shard), model_fn, sink=sink
+            )
+
+
+def merge(out_dir, *extra):
+    argv = ["merge", "geneturing", "--shards", str(SHARDS), "--out-dir", str(out_dir)]
+    with pytest.raises(SystemExit) as exit_info:
+        sharded.main([*argv, "--", *extra] if extra else argv)
+    with open(out_dir / "geneturing_scores.json") as f:
+        return exit_info.value.code, json.load(f)
+
+
+def test_expected_ids_cover_the_selection_once(data_path):
+    expected = sharded.expected_ids("geneturing", SHARDS, ["--limit-per-task", "2"])
+
+    ids = [row_id for shard_ids in expected.values() for row_id in shard_ids]
+    selection = dataset.select_dataframe(
+        dataset.load_dataframe(data_path), limit_per_task=2
+    )
+    assert sorted(ids) == selection.index.tolist()
+    assert len(ids) == len(set(ids))
+
+
+def test_merge_matches_a_single_process_run(data_path, tmp_path):
+    run_shards(data_path, tmp_path)
+    single = geneturing.evaluate_dataset(
+        dataset.load_dataframe(data_path, cache=False), model_fn
+    )
+
+    code, summary = merge(tmp_path)
+
+    results, task_scores, overall = single
+    assert code == 0
+    assert summary["rows"] == len(results)
+    assert summary["missing"] == {}
+    assert summary["task_scores"] == pytest.approx(task_scores)
+    assert summary["overall_score"] == pytest.approx(overall)
+    assert 0 < overall < 1
+
+
+def test_merge_fails_on_a_truncated_shard(data_path, tmp_path):
+    run_shards(data_path, tmp_path)
+    path = sharded.results_path(str(tmp_path), "geneturing", Shard(1, SHARDS))
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, "w") as f:
+        f.writelines(lines[:-1])
+    lost = json.loads(lines[-1])["id"]
+
+    code, summary = merge(tmp_path)
+
+    assert code == 1
+    assert summary["missing"] == {"1/3": [lost]}
@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+from genegpt import starter_geneturing_openai as geneturing
+from genegpt.openai_clients import stream_answer, take_timing, take_usage, usage_metrics
+from genegpt.response_cache import ResponseCache
+
+
+class StubStream:
+    def __init__(self, deltas, usage=None):
+        self.chunks = [
+            SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))],
+                usage=None,
+            )
+            for delta in deltas
+        ]
+        if usage is not None:
+            self.chunks.append(SimpleNamespace(choices=[], usage=usage))
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class StubClient:
+    def __init__(self, make_stream):
+        self.calls = []
+        self.make_stream = make_stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **config):
+        self.calls.append(config)
+        if config.get("stream"):
+            return self.make_stream()
+        message = SimpleNamespace(content="Full reasoning.\nAnswer: FULL")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+MESSAGES = [{"role": "user", "content": "What is the official gene symbol of X?"}]
+
+
+def test_stream_stops_after_the_answer_line():
+    stream = StubStream(["The answer: is not here.\n", "Answer: TP53\n", "ignored"])
+    client = StubClient(lambda: stream)
+
+    text = stream_answer(client, MESSAGES, {"model": "m"})
+
+    assert text == "The answer: is not here.\nAnswer: TP53"
+    assert stream.read == 2
+    assert stream.closed
+    assert take_timing().time_to_answer_s is not None
+
+
+def test_stream_cut_short_leaves_prompt_usage_unknown():
+    client = StubClient(lambda: StubStream(["Answer: TP53\n", "more"]))
+    take_usage()
+
+    stream_answer(client, MESSAGES, {"model": "m"}, include_usage=True)
+    usage = take_usage()
+
+    assert client.calls[0]["stream_options"] == {"include_usage": True}
+    assert usage.prompt_tokens is None
+    assert usage.cached_tokens is None
+    assert usage.completion_tokens > 0
+
+
+def test_full_stream_records_reported_usage():
+    reported = SimpleNamespace(
+        prompt_tokens=120,
+        completion_tokens=7,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=64),
+    )
+    client = StubClient(lambda: StubStream(["Thinking, no answer yet"], reported))
+    take_usage()
+
+    stream_answer(client, MESSAGES, {"model": "m"}, include_usage=True)
+    usage = take_usage()
+
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens) == (
+        120,
+        7,
+        64,
+    )
+
+
+def test_usage_metrics_skip_unreported_rows():
+    rows = [
+        SimpleNamespace(prompt_tokens=100, completion_tokens=5, cached_tokens=50),
+        SimpleNamespace(prompt_tokens=None, completion_tokens=3, cached_tokens=None),
+    ]
+
+    metrics = usage_metrics(rows)
+
+    assert metrics["prompt_tokens"] == 100
+    assert metrics["completion_tokens"] == 8
+    assert metrics["prompt_cache_hit_rate"] == 0.5
+    assert metrics["usage_unreported_rows"] == 1
+
+
+def test_streamed_and_full_responses_are_cached_apart(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    client = StubClient(lambda: StubStream(["Answer: STREAMED\n", "rest"]))
+
+    def ask(stream):
+        return geneturing.query_model(
+            client,
+            [],
+            [],
+            "What is X?",
+            cache=cache,
+            config={"model": "m"},
+            stream=stream,
+        )
+
+    assert ask(stream=True) == "STREAMED"
+    assert ask(stream=False) == "FULL"
+    assert ask(stream=True) == "STREAMED"
+    assert len(client.calls) == 2
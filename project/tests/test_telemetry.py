@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from genegpt.telemetry import TelemetrySink, upload_spool
+
+mlflow = pytest.importorskip("mlflow")
+from mlflow.tracking import MlflowClient  # noqa: E402
+
+# Nothing listens on the discard port, so the sink has to spool
+UNREACHABLE = "http://127.0.0.1:9"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    return (tmp_path / "mlruns").as_uri()
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    """Two artifacts that share a basename."""
+    paths = []
+    for name in ("a", "b"):
+        path = tmp_path / name / "results.csv"
+        path.parent.mkdir()
+        path.write_text(f"from {name}\n")
+        paths.append(str(path))
+    return paths
+
+
+def log_run(sink, artifacts):
+    with sink:
+        sink.log_params({"workers": 8})
+        sink.set_tag("stage", "test")
+        for step in range(3):
+            sink.log_metrics({"row_score": step / 2}, step=step)
+        for path in artifacts:
+            sink.log_artifact(path)
+
+
+def only_run(store, experiment):
+    client = MlflowClient(store)
+    found = client.get_experiment_by_name(experiment)
+    (run,) = client.search_runs([found.experiment_id])
+    return client, run
+
+
+def test_logs_to_a_file_store(store, tmp_path, artifacts):
+    sink = TelemetrySink("direct", run_name="r", tracking_uri=store, flush_interval=0.1)
+    log_run(sink, artifacts[:1])
+
+    client, run = only_run(store, "direct")
+    assert sink.spool_path is None
+    assert run.info.status == "FINISHED"
+    assert run.data.params == {"workers": "8"}
+    assert run.data.tags["stage"] == "test"
+    history = client.get_metric_history(run.info.run_id, "row_score")
+    assert [(m.step, m.value) for m in history] == [(0, 0.0), (1, 0.5), (2, 1.0)]
+    assert [a.path for a in client.list_artifacts(run.info.run_id)] == ["results.csv"]
+
+
+def test_spooled_run_uploads_to_a_file_store(store, tmp_path, artifacts):
+    spool_dir = str(tmp_path / "spool")
+    sinks = [
+        TelemetrySink(
+            "spooled", run_name="r", tracking_uri=UNREACHABLE, spool_dir=spool_dir
+        )
+        for _ in range(2)
+    ]
+    log_run(sinks[0], artifacts)
+    sinks[1].close()
+
+    # Same run name in the same second still gets separate spools
+    assert sinks[0].spool_path != sinks[1].spool_path
+    stashed = []
+    for root, _, files in os.walk(os.path.join(sinks[0].spool_path, "artifacts")):
+        stashed += [open(os.path.join(root, name)).read() for name in files]
+    assert sorted(stashed) == ["from a\n", "from b\n"]
+
+    assert upload_spool(spool_dir, tracking_uri=store) == 2
+    assert os.listdir(spool_dir) == []
+    client = MlflowClient(store)
+    found = client.get_experiment_by_name("spooled")
+    runs = client.search_runs([found.experiment_id])
+    logged = next(run for run in runs if run.data.params)
+    assert logged.info.status == "FINISHED"
+    assert logged.data.params == {"workers": "8"}
+    history = client.get_metric_history(logged.info.run_id, "row_score")
+    assert [m.step for m in history] == [0, 1, 2]